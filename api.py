@@ -0,0 +1,294 @@
+"""Headless JSON stats service over the dashboard's data layer.
+
+A plain ASGI app, so any ASGI server can host it::
+
+    uvicorn api:app --port 8600
+    python api.py            # same, if uvicorn is installed
+
+Endpoints (all GET, all take an optional ``?tournament=<key>``, defaulting
+to the newest tournament):
+
+    /tournaments
+    /top/runs?n=10
+    /top/wickets?n=10
+    /players?q=<text>&n=10
+    /players/<name>
+    /players/<name>/ranks
+    /teams/wins
+
+Responses are serialised once per version of the tables the endpoint
+reads (so a new batting file leaves ``/teams/wins`` cached) and served
+from memory, keyed on the parameters the endpoint reads (so ``?n=5&x=1`` and ``?n=5``
+share an entry) in an LRU of at most ``MAX_CACHED_RESPONSES``. Each
+carries an ETag derived from the tournament's content hash, and a
+matching ``If-None-Match`` gets an empty 304.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import parse_qs, unquote
+
+import leaderboards
+import live
+import loader
+import names
+import players
+import queries
+
+
+MAX_TOP_N = 100
+
+# Serialised responses kept in memory, least recently used dropped first.
+MAX_CACHED_RESPONSES = 1024
+
+store = loader.DataStore()
+if os.environ.get(live.LIVE_FEED_ENV):
+    store.attach_live(live.LIVE_TOURNAMENT, live.LiveFeed(os.environ[live.LIVE_FEED_ENV]).start())
+
+_lock = threading.Lock()
+_responses = OrderedDict()   # (tables' version, tournament, path, params) -> (status, body, etag)
+_views = {}       # tournament -> (player tables' version, PlayerIndex, StatsQueries, LeaderboardSet)
+
+
+class NotFound(Exception):
+    pass
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _json_default(value):
+    if hasattr(value, 'item'):
+        return value.item()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _records(df):
+    # Rates are float32; four decimals drops the float32 noise.
+    return json.loads(df.to_json(orient='records', date_format='iso', double_precision=4))
+
+
+def _view(tournament):
+    """Index, queries and leaderboards for the tournament's current data version.
+
+    Queries and leaderboards track the version of each table they read, so
+    only the index (and the boards pointing into it) is rebuilt, and only
+    when a player table changes.
+    """
+    version = store.version(tournament, players.PlayerIndex.TABLES)
+    with _lock:
+        cached = _views.get(tournament)
+        if cached and cached[0] == version:
+            return cached
+
+    def get_table(table):
+        return store.table(tournament, table)
+
+    def table_version(table):
+        return store.table_version(tournament, table)
+
+    index = players.PlayerIndex({table: get_table(table) for table in players.PlayerIndex.TABLES})
+    stats = cached[2] if cached else queries.StatsQueries(get_table, table_version=table_version)
+    view = (version, index, stats, leaderboards.LeaderboardSet(get_table, index, table_version))
+    with _lock:
+        _views[tournament] = view
+    return view
+
+
+#  HANDLERS
+def _top(tournament, metric, columns, params):
+    top = _view(tournament)[3].top(metric, _top_n(params))
+    # A tournament without the metric's table has nobody to rank.
+    return _records(top[columns]) if not top.empty else []
+
+
+def top_runs(tournament, params):
+    return _top(tournament, 'runs', ['Player', 'Team', 'Runs', 'Ave', 'SR', 'HS'], params)
+
+
+def top_wickets(tournament, params):
+    return _top(tournament, 'wickets', ['Player', 'Team', 'Wkts', 'Ave', 'Econ', 'BBI'], params)
+
+
+def player(tournament, params, name):
+    index = _view(tournament)[1]
+    canonical = index.resolve(name)
+    if canonical is None:
+        raise NotFound(f"Unknown player: {name}")
+    return index.profile(store.tables(tournament), canonical)
+
+
+def player_ranks(tournament, params, name):
+    _, index, _, boards = _view(tournament)
+    canonical = index.resolve(name)
+    if canonical is None:
+        raise NotFound(f"Unknown player: {name}")
+    return {'player': canonical, 'ranks': boards.player_ranks(canonical)}
+
+
+def player_search(tournament, params):
+    index = _view(tournament)[1]
+    return index.search(params.get('q', [''])[0], _top_n(params))
+
+
+def team_wins(tournament, params):
+    stats = _view(tournament)[2]
+    return _records(stats.team_records())
+
+
+def _top_n(params):
+    try:
+        n = int(params.get('n', ['10'])[0])
+    except ValueError:
+        raise BadRequest("n must be an integer")
+    if not 1 <= n <= MAX_TOP_N:
+        raise BadRequest(f"n must be between 1 and {MAX_TOP_N}")
+    return n
+
+
+ROUTES = {
+    '/top/runs': top_runs,
+    '/top/wickets': top_wickets,
+    '/teams/wins': team_wins,
+    '/players': player_search,
+}
+
+# Tables each route reads; the /players routes read the player index's.
+ROUTE_TABLES = {
+    '/top/runs': (leaderboards.METRICS['runs'][0],),
+    '/top/wickets': (leaderboards.METRICS['wickets'][0],),
+    '/teams/wins': ('matches',),
+}
+
+
+def _route_tables(path):
+    return ROUTE_TABLES.get(path, players.PlayerIndex.TABLES)
+
+
+def _cache_params(path, params):
+    """The parameters ``path`` reads, normalised, for the response cache key."""
+    used = []
+    if path in ('/top/runs', '/top/wickets', '/players'):
+        used.append(('n', _top_n(params)))
+    if path == '/players':
+        used.append(('q', names.normalise(params.get('q', [''])[0])))
+    return tuple(used)
+
+
+def _etag(version, path, query):
+    digest = hashlib.sha1(f"{path}?{query}".encode()).hexdigest()[:12]
+    return f'"{version[:16]}-{digest}"'
+
+
+def _dispatch(path, query):
+    """Return (status, body bytes, etag or None) for one request."""
+    tournaments = store.tournaments()
+    if path == '/tournaments':
+        version = hashlib.sha1(''.join(store.version(t) for t in tournaments).encode()).hexdigest()
+        payload = [{'key': t, 'label': loader.tournament_label(t)} for t in tournaments]
+        return 200, json.dumps(payload).encode(), _etag(version, path, query)
+
+    params = parse_qs(query)
+    tournament = params.get('tournament', [tournaments[-1] if tournaments else None])[0]
+    if tournament not in tournaments:
+        raise NotFound(f"Unknown tournament: {tournament}")
+    version = store.version(tournament, _route_tables(path))
+
+    cache_params = _cache_params(path, params)
+    key = (version, tournament, path, cache_params)
+    with _lock:
+        cached = _responses.get(key)
+        if cached:
+            _responses.move_to_end(key)
+            return cached
+
+    if path in ROUTES:
+        payload = ROUTES[path](tournament, params)
+    elif path.startswith('/players/') and path.endswith('/ranks'):
+        payload = player_ranks(tournament, params, unquote(path[len('/players/'):-len('/ranks')]))
+    elif path.startswith('/players/'):
+        payload = player(tournament, params, unquote(path[len('/players/'):]))
+    else:
+        raise NotFound(f"No route for {path}")
+
+    response = (200, json.dumps(payload, default=_json_default).encode(),
+                _etag(version, path, f"tournament={tournament}&{cache_params}"))
+    with _lock:
+        _responses[key] = response
+        while len(_responses) > MAX_CACHED_RESPONSES:
+            _responses.popitem(last=False)
+    return response
+
+
+def _evict_stale():
+    tournaments = set(store.tournaments())
+    versions = {}
+
+    def stale(key):
+        version, tournament, path, _ = key
+        if tournament not in tournaments:
+            return True
+        tables = _route_tables(path)
+        if (tournament, tables) not in versions:
+            versions[tournament, tables] = store.version(tournament, tables)
+        return version != versions[tournament, tables]
+
+    with _lock:
+        for key in [key for key in _responses if stale(key)]:
+            del _responses[key]
+
+
+#  ASGI
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                store.refresh(force=True)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    if store.refresh():
+        _evict_stale()
+
+    etag = None
+    if scope['method'] not in ('GET', 'HEAD'):
+        status, body = 405, json.dumps({'error': 'Method not allowed'}).encode()
+    else:
+        try:
+            status, body, etag = _dispatch(scope['path'].rstrip('/') or '/',
+                                           scope.get('query_string', b'').decode())
+        except NotFound as e:
+            status, body = 404, json.dumps({'error': str(e)}).encode()
+        except BadRequest as e:
+            status, body = 400, json.dumps({'error': str(e)}).encode()
+
+    headers = [(b'content-type', b'application/json')]
+    if etag:
+        headers.append((b'etag', etag.encode()))
+        headers.append((b'cache-control', b'no-cache'))
+        request_headers = dict(scope.get('headers', []))
+        if request_headers.get(b'if-none-match', b'').decode() == etag:
+            status, body = 304, b''
+    headers.append((b'content-length', str(len(body)).encode()))
+
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body',
+                'body': b'' if scope['method'] == 'HEAD' else body})
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn
+    except ImportError:
+        raise SystemExit("Install uvicorn to run the stats service: pip install uvicorn")
+    uvicorn.run(app, host="127.0.0.1", port=8600)
@@ -0,0 +1,228 @@
+"""Benchmark harness for the dashboard's load, compute and render paths.
+
+Runs ``project.py`` headlessly with Streamlit's AppTest against synthetic
+copies of the tournament CSVs scaled up 10x-1000x, and writes one JSON
+object per measurement (JSON Lines) so results can be tracked over time::
+
+    python benchmark.py                       # scales 1, 10, 100 to stdout
+    python benchmark.py --scales 1 1000 --output bench.jsonl
+
+Each page (and each Player Analysis mode) is measured twice: ``cold``, with
+every Streamlit cache and the figure cache cleared, and ``warm``, a plain
+rerun. Wall time is split into ``load`` and ``render`` phases (recorded via
+``telemetry.phase`` in the script) and ``compute``, which is everything
+else the rerun did. Peak memory comes from a separate tracemalloc pass so
+that it does not inflate the timings.
+
+``figures`` counts the matplotlib figures drawn in this process, so the
+chart backend and render worker count are pinned (matplotlib, inline by
+default) and recorded with every measurement.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import charts
+import loader
+import schema
+import telemetry
+
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "project.py")
+CHART_BACKEND_ENV = "T20_CHART_BACKEND"
+
+PAGES = [
+    ("🏆 Tournament Summary", None),
+    ("🏏 Batting Analysis", None),
+    ("⚾ Bowling Analysis", None),
+    ("🧤 Fielding & WK Analysis", None),
+    ("👤 Player Analysis", "Single Player Deep Dive"),
+    ("👤 Player Analysis", "Multi-Player Comparison"),
+    ("🎲 Tournament Simulator", None),
+]
+
+
+#  SYNTHETIC DATA
+def make_synthetic_dataset(out_dir, scale, data_dir=loader.DATA_DIR, seed=0):
+    """Write copies of every stat CSV with ``scale`` times the players and matches.
+
+    Copy ``k`` of each player is renamed ``"<name> #k"`` (copy 0 keeps the real
+    name) and gets its Runs/Wkts/Ct/Dis jittered, so rankings are not all ties.
+    The raw CSV formatting ("94*", "30-Mar") is kept, so cleaning is exercised.
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    for (table, tournament), path in loader.discover_sources(data_dir).items():
+        raw = pd.read_csv(path, dtype=str, keep_default_na=False)
+        copies = []
+        for k in range(scale):
+            part = raw.copy()
+            if k and 'Player' in part.columns:
+                part['Player'] = part['Player'] + f" #{k}"
+                for col in ('Runs', 'Wkts', 'Ct', 'Dis'):
+                    if col in part.columns:
+                        values = pd.to_numeric(part[col], errors='coerce')
+                        jitter = rng.integers(-3, 4, len(part))
+                        part[col] = (values + jitter).clip(lower=0).astype('Int64').astype(str).replace('<NA>', '-')
+            copies.append(part)
+        pd.concat(copies, ignore_index=True).to_csv(
+            os.path.join(out_dir, os.path.basename(path)), index=False)
+    return out_dir
+
+
+#  MEASUREMENTS
+def _clear_caches():
+    import streamlit as st
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    charts.figure_cache.clear()
+
+
+def _goto(at, page, mode):
+    at.sidebar.radio[0].set_value(page)
+    if mode is not None:
+        at.run()
+        next(r for r in at.radio if r.label == "Select View").set_value(mode)
+
+
+def _timed_run(at):
+    recorder = telemetry.start_recording()
+    figures_before = charts.figures_opened
+    start = time.perf_counter()
+    try:
+        at.run()
+    finally:
+        wall = time.perf_counter() - start
+        telemetry.stop_recording()
+    if at.exception:
+        raise RuntimeError(f"Script raised: {at.exception[0].message}")
+    load = recorder.totals.get('load', 0.0)
+    render = recorder.totals.get('render', 0.0)
+    return {
+        'wall_s': round(wall, 6),
+        'load_s': round(load, 6),
+        'render_s': round(render, 6),
+        'compute_s': round(max(wall - load - render, 0.0), 6),
+        # Worker processes keep their own counts, so this is only known inline.
+        'figures': (charts.figures_opened - figures_before
+                    if charts.render_scheduler.max_workers == 0 else None),
+    }
+
+
+def bench_pages(timeout):
+    from streamlit.testing.v1 import AppTest
+
+    results = []
+    for page, mode in PAGES:
+        at = AppTest.from_file(SCRIPT, default_timeout=timeout)
+        at.run()
+        _goto(at, page, mode)
+
+        _clear_caches()
+        cold = _timed_run(at)
+        warm = _timed_run(at)
+
+        _clear_caches()
+        tracemalloc.start()
+        try:
+            at.run()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        cold['peak_mem_bytes'] = peak
+        for run, measured in (('cold', cold), ('warm', warm)):
+            results.append({'kind': 'page', 'page': page, 'mode': mode, 'run': run, **measured})
+    return results
+
+
+def bench_load(data_dir):
+    """Parse-from-CSV vs read-from-snapshot cold start for the data directory."""
+    shutil.rmtree(os.path.join(data_dir, loader.SNAPSHOT_DIRNAME), ignore_errors=True)
+    results = []
+    for run, use_snapshot in (('csv', False), ('snapshot_build', True), ('snapshot', True)):
+        # A fresh process per run would also drop the shared category
+        # dictionaries; clearing them keeps every run equally cold.
+        schema.categories.clear()
+        tracemalloc.start()
+        start = time.perf_counter()
+        store = loader.DataStore(data_dir, use_snapshot=use_snapshot)
+        store.refresh(force=True)
+        # Tables load lazily, so ask for all of them to time the actual parse.
+        for tournament in store.tournaments():
+            store.tables(tournament)
+        wall = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        results.append({'kind': 'load', 'run': run, 'wall_s': round(wall, 6),
+                        'peak_mem_bytes': peak})
+    return results
+
+
+def run(scales, output, timeout, backend="matplotlib", workers=0):
+    stamp = time.strftime('%Y-%m-%dT%H:%M:%S')
+    previous_dir = os.environ.get(loader.DATA_DIR_ENV)
+    previous_backend = os.environ.get(CHART_BACKEND_ENV)
+    previous_workers = charts.render_scheduler.max_workers
+    os.environ[CHART_BACKEND_ENV] = backend
+    charts.render_scheduler.shutdown()
+    charts.render_scheduler.max_workers = workers
+    try:
+        for scale in scales:
+            with tempfile.TemporaryDirectory(prefix=f"t20bench_x{scale}_") as data_dir:
+                make_synthetic_dataset(data_dir, scale)
+                store = loader.DataStore(data_dir, use_snapshot=False)
+                store.refresh(force=True)
+                sizes = {table: int(sum(len(store.tables(t)[table]) for t in store.tournaments()))
+                         for table in loader.TABLES}
+
+                records = bench_load(data_dir)
+                os.environ[loader.DATA_DIR_ENV] = data_dir
+                records += bench_pages(timeout)
+
+                for record in records:
+                    record = {'timestamp': stamp, 'scale': scale, 'rows': sizes,
+                              'backend': backend, 'workers': workers, **record}
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+    finally:
+        charts.render_scheduler.shutdown()
+        charts.render_scheduler.max_workers = previous_workers
+        for name, previous in ((loader.DATA_DIR_ENV, previous_dir),
+                               (CHART_BACKEND_ENV, previous_backend)):
+            if previous is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = previous
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100],
+                        help="data multipliers to benchmark (default: 1 10 100)")
+    parser.add_argument('--output', help="append JSON Lines here instead of stdout")
+    parser.add_argument('--timeout', type=float, default=600,
+                        help="per-run script timeout in seconds")
+    parser.add_argument('--backend', choices=['matplotlib', 'vega'], default='matplotlib',
+                        help="chart backend to render with (default: matplotlib)")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="render pool size; figures are only counted at 0 (default: 0)")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as output:
+            run(args.scales, output, args.timeout, args.backend, args.workers)
+    else:
+        run(args.scales, sys.stdout, args.timeout, args.backend, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,434 @@
+"""Chart drawing functions and the shared figure render cache.
+
+Every chart on the dashboard is drawn by one of the functions in ``CHARTS``
+from a small input frame plus a few options. ``render_chart`` encodes the
+figure to PNG/SVG bytes and keeps them in a size-bounded LRU cache keyed on
+the page, the chart kind, the options and a hash of the input frame, so a
+Streamlit rerun that shows the same chart again is a byte lookup. Entries
+can be tagged with the (table, tournament) pairs they were drawn from, and
+``FigureCache.evict`` drops just those when a table changes.
+
+``RenderScheduler`` draws cache misses in a pool of worker processes, so a
+page with several charts renders them in parallel instead of one by one.
+Each job is a self-contained spec (kind, data, options, theme rcParams).
+"""
+import atexit
+import hashlib
+import io
+import multiprocessing
+import os
+import sys
+import threading
+import types
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+
+import schema
+import telemetry
+
+
+#  THEME
+# Dark dashboard theme shared by every chart.
+THEME_RC = {
+    'figure.facecolor': '#252525',
+    'axes.facecolor': '#252525',
+    'text.color': '#E0E0E0',
+    'axes.labelcolor': '#E0E0E0',
+    'xtick.color': '#E0E0E0',
+    'ytick.color': '#E0E0E0',
+    'axes.titlecolor': '#10F5D6',
+    'figure.dpi': 100,
+}
+
+# Matches the resolution st.pyplot uses when it encodes a figure.
+RENDER_DPI = 200
+
+
+def apply_theme():
+    sns.set_theme(style="darkgrid")
+    plt.rcParams.update(THEME_RC)
+
+
+#  FIGURE LIFECYCLE
+# pyplot keeps every figure it creates alive until it is closed, so a
+# long-running server leaks one figure per chart per rerun unless each
+# chart is drawn inside managed_figure().
+_lifecycle_lock = threading.Lock()
+figures_opened = 0
+figures_closed = 0
+
+
+@contextmanager
+def managed_figure(figsize=None):
+    """Create a figure and always close it, even if drawing fails."""
+    global figures_opened, figures_closed
+    fig, ax = plt.subplots(figsize=figsize)
+    with _lifecycle_lock:
+        figures_opened += 1
+    try:
+        yield fig, ax
+    finally:
+        plt.close(fig)
+        with _lifecycle_lock:
+            figures_closed += 1
+
+
+def live_figure_count():
+    return len(plt.get_fignums())
+
+
+def _tight_layout(fig):
+    with telemetry.span('tight_layout'):
+        fig.tight_layout()
+
+
+#  DRAWING FUNCTIONS
+# Each one draws onto the axes of a managed figure.
+def draw_bar(ax, data, x, y, palette, title, xlabel=None, ylabel=None,
+             figsize=None, rotate_xticks=False):
+    if figsize is not None:
+        ax.figure.set_size_inches(figsize)
+    sns.barplot(data=data, x=x, y=y, palette=palette, ax=ax)
+    ax.set_title(title)
+    if xlabel is not None:
+        ax.set_xlabel(xlabel)
+    if ylabel is not None:
+        ax.set_ylabel(ylabel)
+    if rotate_xticks:
+        plt.setp(ax.get_xticklabels(), rotation=45, ha='right')
+    _tight_layout(ax.figure)
+
+
+def draw_donut(ax, data, values, labels, palette, title):
+    colors = sns.color_palette(palette, len(data))
+    ax.pie(data[values],
+           labels=data[labels],
+           autopct='%1.1f%%',
+           colors=colors,
+           startangle=90,
+           pctdistance=0.85,
+           textprops={'color': 'white'})
+
+    # Create the "donut hole"
+    centre_circle = plt.Circle((0, 0), 0.70, fc='#252525')
+    ax.add_artist(centre_circle)
+
+    ax.set_title(title)
+    ax.axis('equal')
+    _tight_layout(ax.figure)
+
+
+def draw_scatter(ax, data, x, y, size, hue, title):
+    ax.figure.set_size_inches(10, 6)
+    sns.scatterplot(data=data,
+                    x=x,
+                    y=y,
+                    size=size,
+                    hue=hue,
+                    palette='bright',
+                    sizes=(20, 500),
+                    ax=ax)
+    ax.set_title(title)
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
+    _tight_layout(ax.figure)
+
+
+def draw_hist(ax, data, x, color, title, xlabel, bins=20):
+    sns.histplot(data=data, x=x, bins=bins, kde=True, color=color, ax=ax)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    _tight_layout(ax.figure)
+
+
+def draw_wk_breakdown(ax, data):
+    melted = data.melt(
+        id_vars=['Player'],
+        value_vars=['Ct', 'St'],
+        var_name='Dismissal Type',
+        value_name='Count'
+    )
+    melted['Dismissal Type'] = pd.Categorical(melted['Dismissal Type'], ["Ct", "St"])
+
+    ax.figure.set_size_inches(10, 6)
+    sns.barplot(data=melted,
+                y='Player',
+                x='Count',
+                hue='Dismissal Type',
+                palette=["#4C8FFB", "#00BFA5"],
+                ax=ax,
+                order=data['Player'])
+    ax.set_title("Dismissal Breakdown (Catches vs. Stumpings)")
+    ax.set_xlabel("Count")
+    ax.set_ylabel("Player")
+    ax.legend(title='Dismissal Type')
+    _tight_layout(ax.figure)
+
+
+def draw_compare_grid(ax, data, panels):
+    """Small multiples: one row per group, one bar panel per metric.
+
+    ``data`` is long-form Group/Player/Metric/Value and ``panels`` lists
+    (group, metric, title, palette) in display order.
+    """
+    fig = ax.figure
+    fig.clear()
+    groups = [g for g in dict.fromkeys(p[0] for p in panels) if (data['Group'] == g).any()]
+    ncols = max(sum(1 for p in panels if p[0] == g) for g in groups)
+    fig.set_size_inches(4 * ncols, 4.5 * len(groups))
+    axes = fig.subplots(len(groups), ncols, squeeze=False)
+
+    for row, group in enumerate(groups):
+        group_panels = [p for p in panels if p[0] == group]
+        for col, (_, metric, title, palette) in enumerate(group_panels):
+            panel_ax = axes[row][col]
+            values = data[(data['Group'] == group) & (data['Metric'] == metric)]
+            sns.barplot(data=values, x='Player', y='Value', hue='Player',
+                        palette=palette, legend=False, ax=panel_ax)
+            panel_ax.set_title(f"{group}: {title}")
+            panel_ax.set_xlabel("")
+            panel_ax.set_ylabel("")
+            plt.setp(panel_ax.get_xticklabels(), rotation=45, ha='right')
+        for col in range(len(group_panels), ncols):
+            axes[row][col].set_visible(False)
+    _tight_layout(fig)
+
+
+CHARTS = {
+    'bar': draw_bar,
+    'donut': draw_donut,
+    'scatter': draw_scatter,
+    'hist': draw_hist,
+    'wk_breakdown': draw_wk_breakdown,
+    'compare_grid': draw_compare_grid,
+}
+
+
+#  RENDER CACHE
+class FigureCache:
+    """Thread-safe LRU of encoded chart bytes, bounded by total size."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._tags = {}       # key -> tags given to put()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data, tags=()):
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+                self._tags.pop(key, None)
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            if tags:
+                self._tags[key] = frozenset(tags)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                old_key, evicted = self._entries.popitem(last=False)
+                self._tags.pop(old_key, None)
+                self._size -= len(evicted)
+
+    def evict(self, tags):
+        """Drop every entry tagged with any of ``tags``; returns how many."""
+        tags = set(tags)
+        with self._lock:
+            stale = [key for key, entry_tags in self._tags.items() if entry_tags & tags]
+            for key in stale:
+                self._size -= len(self._entries.pop(key))
+                del self._tags[key]
+            self.evictions += len(stale)
+            return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._size = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+# One cache per process, shared by every Streamlit session.
+figure_cache = FigureCache()
+
+
+def frame_hash(df):
+    h = hashlib.sha1()
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    return h.hexdigest()
+
+
+def encode_figure(fig, fmt="png"):
+    buf = io.BytesIO()
+    with telemetry.span('encode'):
+        fig.savefig(buf, format=fmt, dpi=RENDER_DPI, bbox_inches="tight")
+    return buf.getvalue()
+
+
+def _cache_key(page, kind, data, opts, fmt):
+    return (page, kind, frame_hash(data), repr(sorted(opts.items())), fmt)
+
+
+def draw_spec(kind, data, opts, rc, fmt="png"):
+    """Draw and encode one chart spec under the given rcParams."""
+    with plt.rc_context(rc), managed_figure() as (fig, ax):
+        with telemetry.span('draw'):
+            CHARTS[kind](ax, data, **opts)
+        return encode_figure(fig, fmt)
+
+
+def _draw_spec_profiled(kind, data, opts, rc, fmt="png"):
+    """``draw_spec`` in a render worker, plus the spans it took there."""
+    with telemetry.capture() as spans:
+        encoded = draw_spec(kind, data, opts, rc, fmt)
+    return encoded, spans
+
+
+def render_chart(page, kind, data, fmt="png", tags=(), **opts):
+    """Return the encoded bytes of a chart, drawing it only on a cache miss.
+
+    ``tags`` are the (table, tournament) pairs ``data`` came from.
+    """
+    # seaborn draws every category of a categorical, used or not.
+    data = schema.plain(data)
+    key = _cache_key(page, kind, data, opts, fmt)
+    cached = figure_cache.get(key)
+    if cached is not None:
+        return cached
+
+    encoded = draw_spec(kind, data, opts, THEME_RC, fmt)
+    figure_cache.put(key, encoded, tags)
+    return encoded
+
+
+#  PARALLEL RENDERING
+RENDER_WORKERS_ENV = "T20_RENDER_WORKERS"
+
+# Seconds a page waits for its charts from the pool before drawing the rest
+# itself. A worker killed outright (out of memory, a signal) never reports
+# back, so without a limit the page would wait forever.
+RENDER_TIMEOUT = 30
+
+
+def spawn_pool(processes, initializer=None, initargs=(), maxtasksperchild=None):
+    """A spawn-context process Pool that is safe to start under Streamlit.
+
+    spawn, since forking a threaded server is unsafe. Spawned children
+    re-import __main__, which under Streamlit is the dashboard script
+    itself, so it is hidden while the workers start (Pool starts them all
+    up front).
+    """
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        return multiprocessing.get_context("spawn").Pool(
+            processes, initializer=initializer, initargs=initargs,
+            maxtasksperchild=maxtasksperchild)
+    finally:
+        sys.modules['__main__'] = main
+
+
+def _init_worker():
+    matplotlib.use("Agg")
+    apply_theme()
+
+
+class RenderScheduler:
+    """Renders chart specs in worker processes, filling the shared cache.
+
+    ``submit`` returns a Future of the encoded bytes: already resolved on a
+    cache hit, otherwise resolved when a worker finishes. With no workers,
+    or if the pool breaks, charts are drawn inline as before.
+    """
+
+    def __init__(self, max_workers=None):
+        if max_workers is None:
+            # Leave one core for the script thread; one core means inline.
+            max_workers = int(os.environ.get(RENDER_WORKERS_ENV,
+                                             min(4, (os.cpu_count() or 1) - 1)))
+        self.max_workers = max_workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None and self.max_workers > 0:
+                self._pool = spawn_pool(self.max_workers, initializer=_init_worker)
+            return self._pool
+
+    def submit(self, page, kind, data, fmt="png", tags=(), **opts):
+        data = schema.plain(data)
+        key = _cache_key(page, kind, data, opts, fmt)
+        cached = figure_cache.get(key)
+        if cached is not None:
+            done = Future()
+            done.set_result(cached)
+            return done
+
+        pool = self._executor()
+        if pool is not None:
+            future = Future()
+            # The worker has no run to record into, so when this run is
+            # profiled it times itself and sends the spans back with the
+            # bytes, as ``future.worker_spans``.
+            profiled = telemetry.profiling()
+
+            def finished(result):
+                encoded, future.worker_spans = result if profiled else (result, None)
+                figure_cache.put(key, encoded, tags)
+                future.set_result(encoded)
+
+            try:
+                pool.apply_async(_draw_spec_profiled if profiled else draw_spec,
+                                 (kind, data, opts, dict(THEME_RC), fmt),
+                                 callback=finished, error_callback=future.set_exception)
+            except ValueError:  # pool was closed
+                self.shutdown()
+            else:
+                return future
+
+        done = Future()
+        done.set_result(render_chart(page, kind, data, fmt, tags, **opts))
+        return done
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
+
+
+# One pool per process, shared by every Streamlit session.
+render_scheduler = RenderScheduler()
+atexit.register(render_scheduler.shutdown)
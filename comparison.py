@@ -0,0 +1,147 @@
+"""Per-player metric vectors for the Multi-Player Comparison view.
+
+``MetricMatrix`` holds one row per player with the raw values of a fixed
+set of metrics, plus a z-scored copy where every column points the same
+way (higher is better). It is built once per data version; any selection
+is then a fancy-index slice of those arrays, and "most similar players" is
+one vectorised distance computation over the normalised rows.
+
+A dense all-pairs distance matrix would be O(n^2) in memory once several
+seasons are loaded, so neighbours are computed per query instead: one
+O(n * m) distance row and an ``argpartition``.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+BATTING_METRICS = ['Runs', 'Ave', 'SR', 'HS']
+BOWLING_METRICS = ['Wkts', 'Econ', 'Ave', 'SR']
+
+# Bowling figures where a smaller number is the better one.
+BOWLING_LOWER_IS_BETTER = {'Econ', 'Ave', 'SR'}
+
+# (metric, chart title, palette) for each small-multiples panel
+BATTING_PANELS = [
+    ('Runs', "Total Runs", "Blues"),
+    ('Ave', "Batting Average", "Greens"),
+    ('SR', "Strike Rate", "Oranges"),
+    ('HS', "High Score", "YlGnBu"),
+]
+BOWLING_PANELS = [
+    ('Wkts', "Total Wickets", "Reds"),
+    ('Econ', "Economy Rate", "Purples"),
+    ('Ave', "Bowling Average", "bone"),
+    ('SR', "Bowling Strike Rate", "copper"),
+]
+
+# (group, metric, title, palette), as the 'compare_grid' chart expects
+CHART_PANELS = ([('Batting',) + panel for panel in BATTING_PANELS]
+                + [('Bowling',) + panel for panel in BOWLING_PANELS])
+
+
+class MetricMatrix:
+    """Raw and normalised metric vectors for every player in one table."""
+
+    def __init__(self, df, metrics, lower_is_better=(), canonical=None):
+        self.metrics = list(metrics)
+        # Canonical spellings, so a selection matches across tables.
+        self.players = (canonical(df['Player'].tolist()) if canonical is not None
+                        else df['Player'].to_numpy())
+        self.raw = df[self.metrics].to_numpy(dtype=float)
+        self._row = {}
+        for i, name in enumerate(self.players):
+            self._row.setdefault(name, i)
+
+        # Missing values are treated as the worst observed value.
+        signs = np.array([-1.0 if m in lower_is_better else 1.0 for m in self.metrics])
+        oriented = self.raw * signs
+        missing = np.isnan(oriented)
+        worst = np.where(missing, np.inf, oriented).min(axis=0, initial=np.inf)
+        worst = np.where(np.isfinite(worst), worst, 0.0)
+        oriented = np.where(missing, worst, oriented)
+        std = oriented.std(axis=0) if len(oriented) else np.ones(len(self.metrics))
+        self.normalised = (oriented - oriented.mean(axis=0)) / np.where(std > 0, std, 1.0)
+
+    def __contains__(self, name):
+        return name in self._row
+
+    def rows(self, names):
+        return np.array([self._row[name] for name in names if name in self._row], dtype=int)
+
+    def frame(self, names):
+        """Player plus raw metric columns for ``names``, in selection order."""
+        rows = self.rows(names)
+        df = pd.DataFrame(self.raw[rows], columns=self.metrics)
+        df.insert(0, 'Player', self.players[rows])
+        return df
+
+    def similar(self, name, k=5):
+        """The ``k`` players closest to ``name`` on the normalised metrics."""
+        if name not in self._row or len(self.players) < 2:
+            return pd.DataFrame(columns=['Player', 'Distance'] + self.metrics)
+        row = self._row[name]
+        distances = np.sqrt(((self.normalised - self.normalised[row]) ** 2).sum(axis=1))
+        distances[row] = np.inf
+        k = min(k, len(distances) - 1)
+        nearest = np.argpartition(distances, k - 1)[:k]
+        nearest = nearest[np.argsort(distances[nearest], kind='stable')]
+        df = pd.DataFrame(self.raw[nearest], columns=self.metrics)
+        df.insert(0, 'Distance', distances[nearest].round(3))
+        df.insert(0, 'Player', self.players[nearest])
+        return df
+
+
+class ComparisonEngine:
+    """Batting and bowling matrices for one tournament, built on first use.
+
+    ``canonical`` maps a list of names to their canonical spellings
+    (``PlayerIndex.canonical``); without it names are used as they are.
+    """
+
+    def __init__(self, get_table, canonical=None):
+        self.get_table = get_table
+        self.canonical = canonical
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    def _matrix(self, name, build):
+        with self._lock:
+            if name not in self._matrices:
+                self._matrices[name] = build()
+            return self._matrices[name]
+
+    @property
+    def batting(self):
+        return self._matrix('batting', lambda: MetricMatrix(self.get_table('batting'),
+                                                            BATTING_METRICS,
+                                                            canonical=self.canonical))
+
+    @property
+    def bowling(self):
+        def build():
+            bowling = self.get_table('bowling')
+            # Only players who bowled a ball get a bowling vector.
+            bowled = bowling[bowling['Balls'] > 0].copy()
+            # Wicketless bowlers have Ave/SR coerced to 0, which would read as best.
+            no_wickets = bowled['Wkts'] <= 0
+            bowled.loc[no_wickets, ['Ave', 'SR']] = np.nan
+            return MetricMatrix(bowled, BOWLING_METRICS, BOWLING_LOWER_IS_BETTER,
+                                self.canonical)
+        return self._matrix('bowling', build)
+
+    def panels(self, names):
+        """Long-form Group/Player/Metric/Value rows for the small-multiples chart."""
+        parts = []
+        for group, matrix, panels in (('Batting', self.batting, BATTING_PANELS),
+                                      ('Bowling', self.bowling, BOWLING_PANELS)):
+            wide = matrix.frame(names)
+            if wide.empty:
+                continue
+            long = wide.melt(id_vars=['Player'], var_name='Metric', value_name='Value')
+            long.insert(0, 'Group', group)
+            parts.append(long)
+        if not parts:
+            return pd.DataFrame(columns=['Group', 'Player', 'Metric', 'Value'])
+        return pd.concat(parts, ignore_index=True)
@@ -0,0 +1,101 @@
+"""Derived per-player metrics, computed once when a table is loaded.
+
+Every metric is a whole-column NumPy expression over the cleaned table.
+Ratios go through ``ratio``, which masks zero denominators, so a player
+with no dismissals or no wickets gets a missing value rather than ``inf``
+or a misleading 0.
+
+The CSVs carry no ball-by-ball detail (boundaries, dot balls), so balls
+faced is estimated from runs and strike rate, and economy is adjusted for
+maidens, the only dot-ball information available.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _floats(values):
+    # Count columns such as Mat/Inns/NO are left as parsed; '-' becomes missing.
+    return np.asarray(pd.to_numeric(values, errors='coerce'), dtype=float)
+
+
+def ratio(num, den, scale=1.0, decimals=2):
+    """``scale * num / den`` element-wise, missing wherever ``den`` <= 0."""
+    den = np.ma.masked_invalid(_floats(den))
+    den = np.ma.masked_less_equal(den, 0)
+    values = scale * _floats(num) / den
+    return np.ma.round(values, decimals).filled(np.nan)
+
+
+def batting_metrics(df):
+    outs = _floats(df['Inns']) - _floats(df['NO'])
+    # SR = 100 * Runs / balls faced
+    balls_faced = np.round(ratio(df['Runs'], df['SR'], scale=100.0))
+    df['Runs/Inn'] = ratio(df['Runs'], df['Inns'])
+    df['BF'] = balls_faced
+    df['Balls/Out'] = ratio(balls_faced, outs)
+    df['Out/Inn'] = ratio(outs, df['Inns'])
+    return df
+
+
+def bowling_metrics(df):
+    balls = _floats(df['Balls'])
+    df['Balls/Wkt'] = ratio(balls, df['Wkts'])
+    df['Wkts/Mat'] = ratio(df['Wkts'], df['Mat'])
+    # Runs per over across the overs that were not maidens.
+    df['Adj Econ'] = ratio(df['Runs'], balls - 6 * _floats(df['Mdns']), scale=6.0)
+    return df
+
+
+def fielding_metrics(df):
+    df['Ct/Mat'] = ratio(df['Ct'], df['Mat'])
+    return df
+
+
+def wk_metrics(df):
+    df['Dis/Mat'] = ratio(df['Dis'], df['Mat'])
+    return df
+
+
+DERIVERS = {
+    'batting': batting_metrics,
+    'bowling': bowling_metrics,
+    'fielding': fielding_metrics,
+    'wk': wk_metrics,
+}
+
+
+def add_metrics(table, df):
+    """Append the derived columns for ``table`` (a no-op for tables without any)."""
+    if table not in DERIVERS or df.empty:
+        return df
+    return DERIVERS[table](df)
+
+
+def impact(batting, bowling, canonical=None):
+    """All-rounder impact score per player.
+
+    Runs and wickets per match, each divided by the average across every
+    player with that skill, then summed: 1.0 is an average batter's (or
+    bowler's) contribution, and a player who does both scores on both.
+    ``canonical`` maps raw names to one spelling per player
+    (``PlayerIndex.canonical``), so "V Kohli" batting and "Virat Kohli"
+    bowling are summed as one player; without it names are used as they are.
+    """
+    parts = []
+    if not bowling.empty:
+        bowling = bowling[bowling['Balls'] > 0]
+    for df, col in ((batting, 'Runs'), (bowling, 'Wkts')):
+        if df.empty:
+            continue
+        names = df['Player'].to_numpy() if canonical is None else canonical(df['Player'])
+        per_match = pd.Series(ratio(df[col], df['Mat'], decimals=6), index=names)
+        per_match = per_match[~per_match.index.duplicated()].dropna()
+        mean = per_match.mean()
+        if mean > 0:
+            parts.append(per_match / mean)
+    if not parts:
+        return pd.Series(dtype=float, name='Impact')
+    score = parts[0]
+    for part in parts[1:]:
+        score = score.add(part, fill_value=0)
+    return score.round(2).rename('Impact')
@@ -0,0 +1,305 @@
+"""Headless batch export of player and team report packs.
+
+Renders one report per player in the player index and one per team in the
+match results, as PNG or PDF, using the same KPI cards (players.KPI_CARDS)
+and chart drawing functions (charts.CHARTS) as the dashboard::
+
+    python export.py                                  # newest tournament, PNG
+    python export.py --format pdf --workers 4 --out reports
+    python export.py --tournament icc_mens_t20_world_cup_2024 --only teams
+
+Reports are drawn by a pool of worker processes. Each worker loads the
+tables once, from the shared memory-mapped snapshot, and renders reports
+one at a time, streaming each to disk as soon as it is drawn. Workers are
+recycled every ``MAX_TASKS_PER_WORKER`` reports, so memory stays bounded
+however many reports are made.
+
+Every finished report is recorded in ``export-log.jsonl`` next to the
+reports, with the data version it was drawn from. A rerun after an
+interruption skips reports that are already on disk for the current data
+version, so only the missing or stale ones are drawn; ``--force`` redraws
+everything.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import matplotlib
+import matplotlib.pyplot as plt
+import pandas as pd
+from matplotlib.patches import FancyBboxPatch
+
+import charts
+import derived
+import leaderboards
+import loader
+import names
+import players
+import queries
+import schema
+
+
+MAX_TASKS_PER_WORKER = 50
+LOG_NAME = "export-log.jsonl"
+PAGE_SIZE = (11, 8.5)   # inches, landscape
+
+KPI_TITLE_COLOR = "#AAAAAA"
+KPI_VALUE_COLOR = "#00BFA5"
+KPI_CARD_COLOR = "#2E2E2E"
+
+
+#  DRAWING
+def draw_kpi_rows(ax, title, rows):
+    """KPI cards, one row per (heading, [(title, value), ...]) entry."""
+    ax.axis('off')
+    ax.set_title(title, loc='left', fontsize=18)
+    if not rows:
+        return
+    width = 1.0 / max(len(cards) for _, cards in rows)
+    height = 1.0 / len(rows)
+    for r, (heading, cards) in enumerate(rows):
+        top = 1.0 - r * height
+        ax.text(0.0, top - 0.08 * height, heading, fontsize=11, fontweight='bold',
+                va='top', transform=ax.transAxes)
+        for c, (card_title, value) in enumerate(cards):
+            left = c * width
+            ax.add_patch(FancyBboxPatch((left + 0.01, top - 0.95 * height), width - 0.02,
+                                        0.7 * height, boxstyle="round,pad=0.005",
+                                        facecolor=KPI_CARD_COLOR, edgecolor='none',
+                                        transform=ax.transAxes))
+            ax.text(left + width / 2, top - 0.40 * height, card_title, color=KPI_TITLE_COLOR,
+                    fontsize=9, ha='center', va='center', transform=ax.transAxes)
+            ax.text(left + width / 2, top - 0.68 * height, value, color=KPI_VALUE_COLOR,
+                    fontsize=16, fontweight='bold', ha='center', va='center',
+                    transform=ax.transAxes)
+
+
+def _no_data(ax, message):
+    ax.axis('off')
+    ax.text(0.5, 0.5, message, ha='center', va='center', transform=ax.transAxes)
+
+
+class ReportContext:
+    """One tournament's tables and indexes, loaded once per worker."""
+
+    def __init__(self, data_dir, tournament):
+        self.store = loader.DataStore(data_dir)
+        self.store.refresh(force=True)
+        self.tournament = tournament
+        self.version = self.store.version(tournament)
+        self.tables = self.store.tables(tournament)
+        self.player_index = players.PlayerIndex(self.tables)
+        self.boards = leaderboards.LeaderboardSet(self.tables.get, self.player_index)
+        self.queries = queries.StatsQueries(self.tables.get, self.version)
+        self.impact = derived.impact(self.tables['batting'], self.tables['bowling'],
+                                     self.player_index.canonical)
+
+    def teams(self):
+        """Every team in the match results; none without a results file."""
+        matches = self.tables['matches']
+        if 'Team 1' not in matches.columns:
+            return []
+        return sorted(set(matches['Team 1'].dropna().astype(str))
+                      | set(matches['Team 2'].dropna().astype(str)))
+
+    def label(self):
+        return loader.tournament_label(self.tournament)
+
+    def draw_player(self, fig, name):
+        profile = self.player_index.profile(self.tables, name)
+        rows = [(heading, players.kpi_cards(profile, table))
+                for table, heading in players.KPI_SECTIONS.items()]
+        rows.append(("Derived Metrics", players.derived_cards(profile, self.impact.get(name))))
+        rows = [(heading, cards) for heading, cards in rows if cards]
+        team = (profile.get('batting') or {}).get('Team')
+        title = "  ·  ".join(part for part in (name, team, self.label()) if part)
+
+        kpi_ax, chart_ax = fig.subplots(2, 1, gridspec_kw={'height_ratios': [1.3, 1]})
+        draw_kpi_rows(kpi_ax, title, rows)
+        ranks = self.boards.player_ranks(name)
+        if ranks:
+            data = pd.DataFrame({
+                'Metric': [metric.replace('_', ' ').title() for metric in ranks],
+                'Percentile': [rank['percentile'] for rank in ranks.values()],
+            })
+            charts.CHARTS['bar'](chart_ax, data, x='Percentile', y='Metric', palette='viridis',
+                                 title="Percentile Rank Among Qualified Players",
+                                 xlabel="Percentile", ylabel="")
+        else:
+            _no_data(chart_ax, "No ranked metrics for this player.")
+
+    def draw_team(self, fig, team):
+        records = self.queries.team_records()
+        record = records[records['Team'] == team]
+        totals = self.queries.team_totals()
+        total = totals[totals['Team'] == team]
+        cards = []
+        if not record.empty:
+            row = record.iloc[0]
+            cards += [("Played", f"{row['Played']}"), ("Wins", f"{row['Wins']}"),
+                      ("Losses", f"{row['Losses']}"), ("Win %", f"{row['Win %']:.2f}")]
+        if not total.empty:
+            cards += [("Total Runs", f"{int(total['Runs'].iloc[0]):,}"),
+                      ("Total Wickets", f"{int(total['Wkts'].iloc[0])}")]
+
+        grid = fig.add_gridspec(2, 2, height_ratios=[0.8, 1])
+        draw_kpi_rows(fig.add_subplot(grid[0, :]), f"{team}  ·  {self.label()}",
+                      [("Team Record", cards)] if cards else [])
+        for col, (table, metric, title, color) in enumerate((
+                ('batting', 'Runs', "Top 5 Run Scorers", "#4C8FFB"),
+                ('bowling', 'Wkts', "Top 5 Wicket Takers", "#00BFA5"))):
+            ax = fig.add_subplot(grid[1, col])
+            df = self.tables[table]
+            if df.empty or 'Team' not in df.columns:   # no file for this table
+                _no_data(ax, f"No {table} figures.")
+                continue
+            top = schema.plain(df.loc[df['Team'] == team, ['Player', metric]]).nlargest(5, metric)
+            if top.empty:
+                _no_data(ax, f"No {table} figures.")
+                continue
+            charts.CHARTS['bar'](ax, top, x=metric, y='Player', palette=[color],
+                                 title=title, xlabel=metric, ylabel="")
+
+    def render(self, kind, name, fmt):
+        """Encoded bytes of one report."""
+        with plt.rc_context(charts.THEME_RC), charts.managed_figure(PAGE_SIZE) as (fig, _):
+            fig.clear()
+            (self.draw_player if kind == 'player' else self.draw_team)(fig, name)
+            return charts.encode_figure(fig, fmt)
+
+
+#  WORKERS
+_context = None
+
+
+def _init_worker(data_dir, tournament):
+    global _context
+    matplotlib.use("Agg")
+    charts.apply_theme()
+    _context = ReportContext(data_dir, tournament)
+
+
+def _export_one(job):
+    """Render one report and move it into place; returns the job."""
+    kind, name, path, fmt = job
+    data = _context.render(kind, name, fmt)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return job
+
+
+#  RESUME LOG
+def read_log(path):
+    """{(kind, name): (file, version)} of every report already exported."""
+    done = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # a line cut short by an interruption
+                done[(entry['kind'], entry['name'])] = (entry['file'], entry['version'])
+    except OSError:
+        pass
+    return done
+
+
+def _slug(name):
+    return names.normalise(name).replace(' ', '-') or 'unnamed'
+
+
+def export(out_dir, tournament=None, fmt='png', workers=None, only=None, force=False,
+           data_dir=None, progress=None):
+    """Write every report pack; returns (rendered, skipped) counts."""
+    data_dir = data_dir or loader.default_data_dir()
+    if tournament is None:
+        store = loader.DataStore(data_dir)
+        store.refresh(force=True)
+        if not store.tournaments():
+            raise SystemExit(f"No stat CSV files found in {data_dir}")
+        tournament = store.tournaments()[-1]
+
+    # Built in this process too, to list the players and teams.
+    global _context
+    _init_worker(data_dir, tournament)
+    context = _context
+    pack_dir = os.path.join(out_dir, tournament)
+    os.makedirs(pack_dir, exist_ok=True)
+    log_path = os.path.join(pack_dir, LOG_NAME)
+    done = {} if force else read_log(log_path)
+
+    jobs, skipped = [], 0
+    for kind, items in (('player', lambda: context.player_index.players),
+                        ('team', context.teams)):
+        if only is not None and only != kind + 's':
+            continue
+        for name in items():
+            path = os.path.join(pack_dir, kind + 's', f"{_slug(name)}.{fmt}")
+            if done.get((kind, name)) == (os.path.relpath(path, pack_dir), context.version) \
+                    and os.path.exists(path):
+                skipped += 1
+                continue
+            jobs.append((kind, name, path, fmt))
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, len(jobs))
+    pool = None
+    if workers > 1:
+        pool = charts.spawn_pool(workers, initializer=_init_worker,
+                                 initargs=(data_dir, tournament),
+                                 maxtasksperchild=MAX_TASKS_PER_WORKER)
+        results = pool.imap_unordered(_export_one, jobs, chunksize=4)
+    else:
+        results = map(_export_one, jobs)
+
+    rendered = 0
+    try:
+        with open(log_path, 'a', encoding='utf-8') as log:
+            for kind, name, path, _ in results:
+                rendered += 1
+                log.write(json.dumps({'kind': kind, 'name': name,
+                                      'file': os.path.relpath(path, pack_dir),
+                                      'version': context.version}) + "\n")
+                log.flush()
+                if progress is not None:
+                    progress(rendered, len(jobs), path)
+    finally:
+        if pool is not None:
+            pool.terminate()
+    return rendered, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument('--out', default="reports", help="output folder (default: reports)")
+    parser.add_argument('--tournament', help="tournament key (default: the newest)")
+    parser.add_argument('--format', choices=['png', 'pdf'], default='png')
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per core)")
+    parser.add_argument('--only', choices=['players', 'teams'])
+    parser.add_argument('--force', action='store_true',
+                        help="redraw reports that are already up to date")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+
+    def progress(done, total, path):
+        print(f"[{done}/{total}] {path}", file=sys.stderr)
+
+    rendered, skipped = export(args.out, args.tournament, args.format, args.workers,
+                               args.only, args.force, progress=progress)
+    print(f"{rendered} report(s) written, {skipped} already up to date, "
+          f"in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    # Run as the importable module, so the pool's worker functions pickle
+    # as export.* rather than __main__.*, which spawned workers cannot see.
+    import export
+    export.main()
@@ -0,0 +1,136 @@
+"""Pre-sorted leaderboards for every ranked metric.
+
+Each metric (optionally restricted by a qualifier such as "Min. 50 Runs")
+is argsorted once when the data loads. After that a top-N query is a slice
+of the index array, and a player's rank or percentile is a binary search
+over the sorted values.
+
+Ties: the sort is stable, so equal values keep table order, which matches
+``DataFrame.nlargest(keep='first')``. Ranks use standard competition
+ranking ("1224"): a player's rank is one more than the number of players
+strictly better than them.
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+QUALIFIERS = {
+    'min_50_runs': lambda df: df['Runs'] >= 50,
+    'min_5_wickets': lambda df: df['Wkts'] >= 5,
+    'min_10_overs': lambda df: df['Balls'] >= 60,
+}
+
+# name -> (table, column, lower_is_better, qualifier)
+METRICS = {
+    'runs': ('batting', 'Runs', False, None),
+    'high_score': ('batting', 'HS', False, None),
+    'batting_average': ('batting', 'Ave', False, 'min_50_runs'),
+    'strike_rate': ('batting', 'SR', False, 'min_50_runs'),
+    'wickets': ('bowling', 'Wkts', False, None),
+    'economy': ('bowling', 'Econ', True, 'min_10_overs'),
+    'bowling_average': ('bowling', 'Ave', True, 'min_5_wickets'),
+    'catches': ('fielding', 'Ct', False, None),
+    'dismissals': ('wk', 'Dis', False, None),
+}
+
+
+class Leaderboard:
+    """One metric of one table, sorted best first."""
+
+    def __init__(self, df, column, lower_is_better=False, qualifier=None):
+        self.df = df
+        values = df[column].to_numpy(dtype=float)
+        eligible = ~np.isnan(values)
+        if qualifier is not None:
+            eligible &= QUALIFIERS[qualifier](df).to_numpy()
+        positions = np.flatnonzero(eligible)
+
+        # Sort on a key where smaller is always better.
+        self._sign = 1.0 if lower_is_better else -1.0
+        keys = self._sign * values[positions]
+        order = np.argsort(keys, kind='stable')
+        self.order = positions[order]          # row positions, best first
+        self.sorted_keys = keys[order]         # ascending
+        self.values = values
+        self.eligible = eligible
+
+    def __len__(self):
+        return len(self.order)
+
+    def top(self, n, ties='first'):
+        """Top ``n`` rows; ``ties='all'`` also keeps rows tied with the n-th."""
+        if ties == 'all' and 0 < n < len(self.order):
+            n = int(np.searchsorted(self.sorted_keys, self.sorted_keys[n - 1], side='right'))
+        return self.df.iloc[self.order[:n]]
+
+    def rank(self, position):
+        """Competition rank of a row position, or None if it does not qualify."""
+        if not self.eligible[position]:
+            return None
+        value = self.values[position]
+        return int(np.searchsorted(self.sorted_keys, self._sign * value, side='left')) + 1
+
+    def percentile(self, position):
+        """Share of qualified players this row ranks level with or ahead of."""
+        rank = self.rank(position)
+        if rank is None:
+            return None
+        return round(100.0 * (1 - (rank - 1) / len(self.order)), 2)
+
+
+class LeaderboardSet:
+    """Every metric in ``METRICS`` for one tournament.
+
+    Tables come from a ``get_table(name)`` callable and each board is built
+    the first time it is used, so a page only loads the tables it ranks.
+    With a ``table_version(name)`` callable a board is also rebuilt once its
+    own table changes, leaving the boards of other tables in place.
+    """
+
+    def __init__(self, get_table, player_index=None, table_version=None):
+        self.get_table = get_table
+        self.player_index = player_index
+        self.table_version = table_version
+        self._boards = {}     # metric -> (version of its table, board)
+        self._lock = threading.Lock()
+
+    def board(self, metric):
+        """The leaderboard for ``metric``, or None if its table is empty."""
+        table, column, lower_is_better, qualifier = METRICS[metric]
+        version = self.table_version(table) if self.table_version is not None else None
+        with self._lock:
+            entry = self._boards.get(metric)
+            if entry is None or entry[0] != version:
+                df = self.get_table(table)
+                entry = self._boards[metric] = (
+                    version, None if df is None or df.empty
+                    else Leaderboard(df, column, lower_is_better, qualifier))
+            return entry[1]
+
+    def top(self, metric, n, ties='first'):
+        """Top ``n`` rows; an empty frame when the metric's table is empty or missing."""
+        board = self.board(metric)
+        if board is None:
+            df = self.get_table(METRICS[metric][0])
+            return df.iloc[:0] if df is not None else pd.DataFrame()
+        return board.top(n, ties)
+
+    def player_ranks(self, name):
+        """Rank, field size, percentile and value of a player on every metric."""
+        found = self.player_index.locate(name)
+        ranks = {}
+        for metric, (table, _, _, _) in METRICS.items():
+            position = found.get(table)
+            board = self.board(metric) if position is not None else None
+            rank = board.rank(position) if board is not None else None
+            if rank is None:
+                continue
+            ranks[metric] = {
+                'rank': rank,
+                'of': len(board),
+                'percentile': board.percentile(position),
+                'value': round(float(board.values[position]), 4),  # rates are float32
+            }
+        return ranks
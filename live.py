@@ -0,0 +1,373 @@
+"""Ball-by-ball live ingestion with incrementally updated totals.
+
+Events arrive as JSON Lines, either tailed from a file or read from a TCP
+socket. A delivery looks like::
+
+    {"match": "m1", "innings": 1, "over": 0, "ball": 1,
+     "batting_team": "India", "bowling_team": "Pakistan",
+     "batter": "RG Sharma", "non_striker": "V Kohli", "bowler": "Shaheen Shah Afridi",
+     "runs": 4, "extras": 0, "extra_type": null,
+     "wicket": {"kind": "caught", "player_out": "RG Sharma", "fielder": "Babar Azam"}}
+
+``non_striker`` is optional; when given, the non-striker's innings counts
+from their first ball at the crease, even if they never face one. A
+player out (a run-out non-striker, say) gets an innings either way.
+``extra_type`` is one of "wide", "noball", "bye" or "legbye", and
+``wicket`` is null when nobody is out. Catches taken by the wicketkeeper
+carry ``"keeper": true`` and count towards the keeping table, as do
+stumpings; every other catch counts towards fielding. A finished match can be reported
+with ``{"type": "result", "match": "m1", "team1": ..., "team2": ...,
+"winner": ..., "margin": "6 runs", "ground": ..., "date": "6/9/2024"}``.
+
+``LiveAggregator.apply`` updates the batting, bowling and fielding counters
+in O(1) per event. ``publish`` turns the counters into frames with the same
+columns as the cleaned CSV tables, in O(players) rather than O(events).
+Each published ``LiveSnapshot`` is immutable and carries a version number,
+so the pages cache against it exactly like a file-backed tournament.
+"""
+import json
+import socket
+import threading
+import time
+import warnings
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import derived
+import loader
+
+
+LIVE_TOURNAMENT = "live"
+LIVE_FEED_ENV = "T20_LIVE_FEED"
+
+# Seconds between the dashboard's checks for a new snapshot.
+POLL_INTERVAL = 0.5
+
+# Dismissals not credited to the bowler.
+NON_BOWLER_WICKETS = {'run out', 'retired hurt', 'retired out', 'obstructing the field'}
+
+# Wickets that end an innings without the batter being out.
+NOT_OUT_WICKETS = {'retired hurt'}
+
+
+class LiveSnapshot:
+    """One published, read-only view of the live totals."""
+
+    def __init__(self, version, tables):
+        self.version = version
+        self.tables = tables
+        self.published_at = time.time()
+
+
+def _batting_counters():
+    return {'Team': None, 'matches': set(), 'Inns': 0, 'dismissals': 0, 'Runs': 0,
+            'balls': 0, 'HS': 0, '100': 0, '50': 0, '0': 0}
+
+
+def _bowling_counters():
+    return {'Team': None, 'matches': set(), 'innings': set(), 'Balls': 0, 'Runs': 0,
+            'Wkts': 0, 'Mdns': 0, 'over': None, 'over_balls': 0, 'over_runs': 0}
+
+
+def _fielding_counters():
+    return {'Team': None, 'matches': set(), 'innings': set(), 'Ct': 0, 'St': 0}
+
+
+class LiveAggregator:
+    """Running batting, bowling and fielding totals built from ball events."""
+
+    def __init__(self):
+        self.batting = defaultdict(_batting_counters)
+        self.bowling = defaultdict(_bowling_counters)
+        self.fielding = defaultdict(_fielding_counters)
+        self.keeping = defaultdict(_fielding_counters)
+        self.results = {}
+        self.innings_runs = {}    # (match, innings, batter) -> runs so far
+        self.events = 0
+        self._snapshot = LiveSnapshot(0, self._frames())
+        self._lock = threading.Lock()
+
+    #  EVENTS
+    # Fields a delivery cannot be applied without.
+    REQUIRED = ('match', 'batter', 'bowler')
+
+    def apply(self, event):
+        """Apply one event; raises ValueError, leaving the totals alone, if it is malformed."""
+        if not isinstance(event, dict):
+            raise ValueError(f"Event is not an object: {event!r}")
+        required = ('match',) if event.get('type') == 'result' else self.REQUIRED
+        missing = [field for field in required if field not in event]
+        if missing:
+            raise ValueError(f"Event is missing {', '.join(missing)}: {event!r}")
+        with self._lock:
+            if event.get('type') == 'result':
+                self._apply_result(event)
+            else:
+                self._apply_ball(event)
+            self.events += 1
+
+    def _apply_result(self, event):
+        self.results[event['match']] = {
+            'Team 1': event.get('team1'),
+            'Team 2': event.get('team2'),
+            'Winner': event.get('winner'),
+            'Margin': event.get('margin', '-'),
+            'Ground': event.get('ground', ''),
+            'Match Date': event.get('date', ''),
+        }
+
+    def _at_crease(self, name, match, innings, team):
+        """A batter's counters, with their innings started on first appearance."""
+        batter = self.batting[name]
+        batter['Team'] = team or batter['Team']
+        batter['matches'].add(match)
+        if (match, innings, name) not in self.innings_runs:
+            self.innings_runs[(match, innings, name)] = 0
+            batter['Inns'] += 1
+        return batter
+
+    def _apply_ball(self, event):
+        match, innings = event['match'], event.get('innings', 1)
+        extra_type = event.get('extra_type')
+        runs, extras = event.get('runs', 0), event.get('extras', 0)
+        legal = extra_type not in ('wide', 'noball')
+        team = event.get('batting_team')
+
+        # Batting
+        batter = self._at_crease(event['batter'], match, innings, team)
+        if event.get('non_striker'):
+            self._at_crease(event['non_striker'], match, innings, team)
+        key = (match, innings, event['batter'])
+        before = self.innings_runs[key]
+        after = before + runs
+        self.innings_runs[key] = after
+        batter['Runs'] += runs
+        if extra_type != 'wide':
+            batter['balls'] += 1
+        batter['HS'] = max(batter['HS'], after)
+        # A hundred replaces the fifty it passed through.
+        if before < 50 <= after:
+            batter['50'] += 1
+        if before < 100 <= after:
+            batter['100'] += 1
+            batter['50'] -= 1
+
+        # Bowling
+        bowler = self.bowling[event['bowler']]
+        bowler['Team'] = event.get('bowling_team', bowler['Team'])
+        bowler['matches'].add(match)
+        bowler['innings'].add((match, innings))
+        conceded = runs + (extras if extra_type in ('wide', 'noball') else 0)
+        bowler['Runs'] += conceded
+        over = (match, innings, event.get('over'))
+        if bowler['over'] != over:
+            bowler['over'], bowler['over_balls'], bowler['over_runs'] = over, 0, 0
+        bowler['over_runs'] += conceded
+        if legal:
+            bowler['Balls'] += 1
+            bowler['over_balls'] += 1
+            if bowler['over_balls'] == 6 and bowler['over_runs'] == 0:
+                bowler['Mdns'] += 1
+
+        # Wickets and fielding
+        wicket = event.get('wicket')
+        if wicket:
+            kind = wicket.get('kind', '')
+            out = wicket.get('player_out', event['batter'])
+            # Whoever is out batted, even a non-striker run out before facing.
+            dismissed = self._at_crease(out, match, innings, team)
+            if kind not in NOT_OUT_WICKETS:
+                dismissed['dismissals'] += 1
+                if self.innings_runs[(match, innings, out)] == 0:
+                    dismissed['0'] += 1
+            if kind not in NON_BOWLER_WICKETS:
+                bowler['Wkts'] += 1
+            fielder_name = wicket.get('fielder')
+            if fielder_name and kind in ('caught', 'stumped'):
+                by_keeper = kind == 'stumped' or wicket.get('keeper', False)
+                fielder = (self.keeping if by_keeper else self.fielding)[fielder_name]
+                fielder['Team'] = event.get('bowling_team', fielder['Team'])
+                fielder['matches'].add(match)
+                fielder['innings'].add((match, innings))
+                fielder['Ct' if kind == 'caught' else 'St'] += 1
+
+    #  SNAPSHOTS
+    def _frames(self):
+        """Counters as frames shaped like the cleaned CSV tables."""
+        def frame(counters, columns):
+            if not counters:
+                return pd.DataFrame(columns=columns)
+            df = pd.DataFrame.from_dict(counters, orient='index')
+            df.index.name = 'Player'
+            df['Mat'] = df['matches'].map(len)
+            if 'innings' in df.columns:
+                df['Inns'] = df['innings'].map(len)
+            return df.reset_index()
+
+        bat = frame(self.batting, ['Player', 'Team', 'Mat', 'Inns', 'NO', 'Runs', 'HS', 'Ave',
+                                   'SR', '100', '50', '0'])
+        if not bat.empty:
+            bat['NO'] = bat['Inns'] - bat['dismissals']
+            outs = bat['dismissals'].to_numpy(dtype=float)
+            balls = bat['balls'].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bat['Ave'] = np.where(outs > 0, bat['Runs'] / outs, 0).round(2)
+                bat['SR'] = np.where(balls > 0, 100 * bat['Runs'] / balls, 0).round(2)
+            bat = bat[['Player', 'Team', 'Mat', 'Inns', 'NO', 'Runs', 'HS', 'Ave', 'SR',
+                       '100', '50', '0']]
+
+        bowl = frame(self.bowling, ['Player', 'Team', 'Mat', 'Inns', 'Balls', 'Mdns', 'Runs',
+                                    'Wkts', 'BBI', 'Ave', 'Econ', 'SR'])
+        if not bowl.empty:
+            balls = bowl['Balls'].to_numpy(dtype=float)
+            wkts = bowl['Wkts'].to_numpy(dtype=float)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                bowl['Ave'] = np.where(wkts > 0, bowl['Runs'] / wkts, 0).round(2)
+                bowl['Econ'] = np.where(balls > 0, 6 * bowl['Runs'] / balls, 0).round(2)
+                bowl['SR'] = np.where(wkts > 0, balls / wkts, 0).round(2)
+            bowl['BBI'] = '-'
+            bowl = bowl[['Player', 'Team', 'Mat', 'Inns', 'Balls', 'Mdns', 'Runs', 'Wkts',
+                         'BBI', 'Ave', 'Econ', 'SR']]
+
+        field = frame(self.fielding, ['Player', 'Team', 'Mat', 'Inns', 'Ct'])
+        if not field.empty:
+            field = field[['Player', 'Team', 'Mat', 'Inns', 'Ct']]
+
+        wk = frame(self.keeping, ['Player', 'Team', 'Mat', 'Inns', 'Dis', 'Ct', 'St'])
+        if not wk.empty:
+            wk['Dis'] = wk['Ct'] + wk['St']
+            wk = wk[['Player', 'Team', 'Mat', 'Inns', 'Dis', 'Ct', 'St']]
+
+        matches = pd.DataFrame(list(self.results.values()),
+                               columns=['Team 1', 'Team 2', 'Winner', 'Margin', 'Ground',
+                                        'Match Date'])
+        if not matches.empty:
+            matches = loader.clean_matches(matches)
+
+        tables = {'batting': bat, 'bowling': bowl, 'fielding': field, 'wk': wk,
+                  'matches': matches}
+        for table, df in tables.items():
+            derived.add_metrics(table, df)
+            df['Tournament'] = LIVE_TOURNAMENT
+        return tables
+
+    def publish(self):
+        """Swap in a new snapshot if any event arrived since the last one."""
+        with self._lock:
+            if self._snapshot.version == self.events:
+                return self._snapshot
+            self._snapshot = LiveSnapshot(self.events, self._frames())
+            return self._snapshot
+
+    def snapshot(self):
+        return self._snapshot
+
+
+#  SOURCES
+def tail_file(path, poll_interval=0.1, stop=None):
+    """Yield complete lines of a JSON Lines file as it grows; None while idle.
+
+    A last line still being written is held back until its newline arrives.
+    """
+    with open(path, encoding='utf-8') as f:
+        partial = ''
+        while stop is None or not stop.is_set():
+            line = f.readline()
+            if not line:
+                time.sleep(poll_interval)
+                yield None
+                continue
+            partial += line
+            if not partial.endswith('\n'):
+                continue
+            line, partial = partial, ''
+            if line.strip():
+                yield line
+
+
+def read_socket(host, port, timeout=0.5, stop=None):
+    """Yield complete lines of a TCP stream of JSON Lines; None while idle."""
+    with socket.create_connection((host, port)) as conn:
+        conn.settimeout(timeout)
+        buffer = b''
+        while stop is None or not stop.is_set():
+            try:
+                chunk = conn.recv(65536)
+            except socket.timeout:
+                yield None
+                continue
+            if not chunk:
+                return
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                if line.strip():
+                    yield line.decode('utf-8', errors='replace')
+
+
+def open_source(spec, stop=None):
+    """``tcp://host:port`` reads a socket; anything else is tailed as a file."""
+    if spec.startswith('tcp://'):
+        host, port = spec[len('tcp://'):].rsplit(':', 1)
+        return read_socket(host, int(port), stop=stop)
+    return tail_file(spec, stop=stop)
+
+
+class LiveFeed:
+    """Consumes one source on a background thread and publishes snapshots.
+
+    Snapshots are published at most every ``publish_interval`` seconds, so
+    a burst of events costs one frame rebuild rather than one per ball.
+    A malformed event is warned about, counted in ``skipped`` and left out;
+    ``error`` keeps the latest problem, and the feed only stops (``running``
+    turns False) when the source itself fails.
+    """
+
+    def __init__(self, spec, publish_interval=0.25):
+        self.spec = spec
+        self.publish_interval = publish_interval
+        self.aggregator = LiveAggregator()
+        self.error = None
+        self.skipped = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="live-feed", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def snapshot(self):
+        return self.aggregator.snapshot()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _apply_line(self, line):
+        try:
+            self.aggregator.apply(json.loads(line))
+        # Bad JSON, missing fields or values of the wrong type.
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.skipped += 1
+            self.error = e
+            warnings.warn(f"Skipped malformed live event: {e}")
+
+    def _run(self):
+        last_publish = 0.0
+        try:
+            for line in open_source(self.spec, stop=self._stop):
+                if line is not None:
+                    self._apply_line(line)
+                now = time.monotonic()
+                if now - last_publish >= self.publish_interval:
+                    self.aggregator.publish()
+                    last_publish = now
+        except OSError as e:
+            self.error = e
+        finally:
+            self.aggregator.publish()
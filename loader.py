@@ -0,0 +1,509 @@
+"""Discovery, loading and cleaning of the tournament stat files.
+
+Stat files are discovered in the data directory by name, e.g.
+``batting_stats_for_icc_mens_t20_world_cup_2024.csv`` or
+``match_results_for_bilateral_t20is_2025.csv``. The part after ``_for_``
+is the tournament key, and every row is tagged with it in a
+``Tournament`` column.
+
+``DataStore`` holds one cleaned frame per source file. ``refresh`` re-stats
+the directory and only files that are new or changed are parsed again, so
+adding a tournament does not re-read the rest of the corpus. Tables are
+loaded lazily, the first time a page asks for them.
+
+Each cleaned file is also written to an uncompressed Arrow (Feather v2)
+snapshot, together with the mtime, size and SHA-1 of its source CSV. Loaded
+frames are zero-copy views over the memory-mapped snapshot, so every
+session and every Streamlit process on a host reads the same page-cache
+pages: the data is parsed once per version, by whichever process gets to
+it first, and memory stays flat as sessions are added. A changed CSV gets
+a new snapshot swapped in with an atomic rename; frames already handed out
+keep mapping the old file until they are dropped.
+
+Every cached layer above the store keys on the version of the tables it
+reads (``version(tournament, tables)``), not of the whole tournament, so
+a new batting file rebuilds batting-derived caches and leaves the bowling
+ones warm. ``watch`` polls for changes in a background thread, so a new
+file is picked up between page views, and ``subscribe`` hands each set of
+changed (table, tournament) pairs to caches that evict rather than re-key.
+
+Loaded frames use the compact dtypes declared in schema.py (shared
+categoricals for names, small integers for counts, float32 for rates), and
+``memory_report`` shows how much that saves over the parsed frames.
+
+Run ``python loader.py`` to (re)build the snapshots ahead of deployment.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import warnings
+
+import pandas as pd
+
+import derived
+import schema
+import telemetry
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # snapshot is skipped without pyarrow
+    pa = feather = None
+
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Point the app at another data folder (e.g. benchmark data) without moving files.
+DATA_DIR_ENV = "T20_DATA_DIR"
+SNAPSHOT_DIRNAME = ".snapshot"
+
+# Bump whenever the cleaning below changes, so old snapshots are rebuilt.
+SNAPSHOT_FORMAT = 7
+
+TABLE_PREFIXES = {
+    'batting_stats': 'batting',
+    'bowling_stats': 'bowling',
+    'fielding_stats': 'fielding',
+    'match_results': 'matches',
+    'wk_stats': 'wk',
+}
+TABLES = tuple(TABLE_PREFIXES.values())
+
+SOURCE_PATTERN = re.compile(
+    r'^(?P<prefix>' + '|'.join(TABLE_PREFIXES) + r')_for_(?P<tournament>\w+)\.csv$'
+)
+
+BAT_NUM_COLS = ['Runs', 'Ave', 'SR', '100', '50', '0', 'HS']
+BOWL_NUM_COLS = ['Balls', 'Mdns', 'Runs', 'Wkts', 'Ave', 'Econ', 'SR']
+WK_NUM_COLS = ['Dis', 'Ct', 'St']
+
+MONTHS = {name: i for i, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], start=1)}
+
+
+#  CLEANING
+def _to_numeric(df, cols):
+    for col in cols:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+def clean_batting(df):
+    df['HS'] = df['HS'].astype(str).str.replace('*', '', regex=False)
+    return _to_numeric(df, BAT_NUM_COLS)
+
+
+def parse_bbi(bbi):
+    """Split best bowling figures into (wickets, runs) integer columns.
+
+    Excel turned "3/30" into "30-Mar" (runs-month) and, when the runs could
+    not be a day, "1/39" into "Jan-39" (month-year). Both are repaired along
+    with plain "w/r" values; anything else ("-") is left missing.
+    """
+    bbi = bbi.astype(str).str.strip()
+    plain = bbi.str.extract(r'^(?P<wkts>\d+)/(?P<runs>\d+)$')
+    day_month = bbi.str.extract(r'^(?P<runs>\d{1,2})-(?P<wkts>[A-Za-z]{3})$')
+    month_year = bbi.str.extract(r'^(?P<wkts>[A-Za-z]{3})-(?P<runs>\d{2})$')
+
+    wkts = (pd.to_numeric(plain['wkts'])
+            .fillna(day_month['wkts'].str.title().map(MONTHS))
+            .fillna(month_year['wkts'].str.title().map(MONTHS)))
+    runs = (pd.to_numeric(plain['runs'])
+            .fillna(pd.to_numeric(day_month['runs']))
+            .fillna(pd.to_numeric(month_year['runs'])))
+    return wkts.astype('Int64'), runs.astype('Int64')
+
+
+def clean_bowling(df):
+    df = _to_numeric(df, BOWL_NUM_COLS)
+    df['bbi_wkts'], df['bbi_runs'] = parse_bbi(df['BBI'])
+    parsed = df['bbi_wkts'].notna() & df['bbi_runs'].notna()
+    df.loc[parsed, 'BBI'] = (df.loc[parsed, 'bbi_wkts'].astype(str) + '/'
+                             + df.loc[parsed, 'bbi_runs'].astype(str))
+    return df
+
+
+def clean_fielding(df):
+    return _to_numeric(df, ['Ct'])
+
+
+def clean_matches(df):
+    df = df[~df['Winner'].isin(['no result', 'tied'])].reset_index(drop=True)
+    df['Match Date'] = pd.to_datetime(df['Match Date'], format='%m/%d/%Y', errors='coerce')
+
+    # "7 wickets" / "25 runs" / "1 run"; anything else is left missing.
+    margin = df['Margin'].astype(str).str.strip().str.extract(r'^(\d+)\s+(run|wicket)s?$')
+    df['margin_value'] = pd.to_numeric(margin[0]).astype('Int64')
+    df['margin_kind'] = margin[1].map({'run': 'runs', 'wicket': 'wickets'})
+    return df
+
+
+def clean_wk(df):
+    return _to_numeric(df, WK_NUM_COLS)
+
+
+CLEANERS = {
+    'batting': clean_batting,
+    'bowling': clean_bowling,
+    'fielding': clean_fielding,
+    'matches': clean_matches,
+    'wk': clean_wk,
+}
+
+
+def read_source(path, table, tournament):
+    with telemetry.span('read_csv'):
+        df = pd.read_csv(path)
+    with telemetry.span('clean'):
+        df = CLEANERS[table](df)
+    with telemetry.span('derive'):
+        df = derived.add_metrics(table, df)
+    df['Tournament'] = tournament
+    return df
+
+
+#  DISCOVERY
+def default_data_dir():
+    return os.environ.get(DATA_DIR_ENV, DATA_DIR)
+
+
+def discover_sources(data_dir=DATA_DIR):
+    """Map (table, tournament) to the CSV path for every stat file found."""
+    sources = {}
+    for entry in os.scandir(data_dir):
+        match = SOURCE_PATTERN.match(entry.name)
+        if match and entry.is_file():
+            sources[(TABLE_PREFIXES[match['prefix']], match['tournament'])] = entry.path
+    return sources
+
+
+def tournament_sort_key(tournament):
+    # Editions sort by year first, so the newest one is last.
+    years = re.findall(r'\d{4}', tournament)
+    return (int(years[-1]) if years else 0, tournament)
+
+
+def tournament_label(tournament):
+    acronyms = {'icc': 'ICC', 't20i': 'T20I', 't20is': 'T20Is', 'odi': 'ODI', 'odis': 'ODIs'}
+    return ' '.join(acronyms.get(word, word.capitalize()) for word in tournament.split('_'))
+
+
+#  SNAPSHOT
+def file_fingerprint(path):
+    st = os.stat(path)
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return {'mtime': st.st_mtime, 'size': st.st_size, 'sha1': h.hexdigest()}
+
+
+def _snapshot_dir(data_dir):
+    return os.path.join(data_dir, SNAPSHOT_DIRNAME)
+
+
+def _snapshot_path(data_dir, path):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(_snapshot_dir(data_dir), f"{name}.feather")
+
+
+def read_manifest(data_dir=DATA_DIR):
+    try:
+        with open(os.path.join(_snapshot_dir(data_dir), "manifest.json")) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if manifest.get('format') != SNAPSHOT_FORMAT:
+        return {}
+    return manifest.get('sources', {})
+
+
+def write_manifest(sources, data_dir=DATA_DIR):
+    snapshot_dir = _snapshot_dir(data_dir)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    tmp_path = os.path.join(snapshot_dir, f"manifest.json.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        json.dump({'format': SNAPSHOT_FORMAT, 'sources': sources}, f, indent=2)
+    os.replace(tmp_path, os.path.join(snapshot_dir, "manifest.json"))
+
+
+def _to_arrow(series):
+    if series.dtype.kind == 'f':
+        # Keep NaN as a value rather than a null, so the column maps zero-copy.
+        return pa.array(series.to_numpy(), from_pandas=False)
+    return pa.Array.from_pandas(series)
+
+
+def write_snapshot(df, path, data_dir=DATA_DIR):
+    """Write one cleaned frame to the snapshot, replacing it atomically."""
+    os.makedirs(_snapshot_dir(data_dir), exist_ok=True)
+    snapshot_path = _snapshot_path(data_dir, path)
+    table = pa.Table.from_arrays([_to_arrow(df[col]) for col in df.columns],
+                                 names=[str(col) for col in df.columns])
+    tmp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, snapshot_path)
+
+
+def _from_arrow(column):
+    """A pandas array over ``column``'s buffers, without copying where Arrow allows."""
+    array = column.combine_chunks() if column.num_chunks != 1 else column.chunk(0)
+    if pa.types.is_dictionary(array.type) and array.null_count == 0:
+        categories = pd.Index(array.dictionary.to_pandas())
+        return pd.Categorical.from_codes(array.indices.to_numpy(zero_copy_only=True),
+                                         dtype=pd.CategoricalDtype(categories))
+    if (pa.types.is_integer(array.type) or pa.types.is_floating(array.type)
+            or pa.types.is_timestamp(array.type)):
+        if array.null_count == 0:
+            return array.to_numpy(zero_copy_only=True)
+        if pa.types.is_integer(array.type):
+            return pd.arrays.IntegerArray(array.fill_null(0).to_numpy(),
+                                          array.is_null().to_numpy(zero_copy_only=False))
+    return array.to_pandas()
+
+
+def read_snapshot(path, data_dir=DATA_DIR):
+    """One snapshot as a read-only frame over the memory-mapped file."""
+    table = feather.read_table(_snapshot_path(data_dir, path), memory_map=True)
+    return pd.DataFrame({name: _from_arrow(table.column(name)) for name in table.column_names},
+                        copy=False)
+
+
+#  STORE
+class DataStore:
+    """In-memory store of cleaned tables for every discovered tournament.
+
+    ``refresh`` only fingerprints the source files; each table is parsed (or
+    read from its snapshot) the first time ``table`` asks for it.
+    """
+
+    def __init__(self, data_dir=None, use_snapshot=True, refresh_interval=5.0):
+        self.data_dir = data_dir or default_data_dir()
+        self.use_snapshot = use_snapshot and feather is not None
+        self.refresh_interval = refresh_interval
+        self._sources = {}    # (table, tournament) -> (path, fingerprint)
+        self._frames = {}     # (table, tournament) -> cleaned frame, once loaded
+        self._combined = {}   # table -> frame across all tournaments
+        self._live = {}       # tournament -> live.LiveFeed
+        self._memory = {}     # (table, tournament) -> (parsed bytes, compact bytes)
+        self._listeners = []  # callables given each set of changed (table, tournament) keys
+        self._watcher = None
+        self._last_refresh = None
+        self._lock = threading.RLock()
+
+    def refresh(self, force=False):
+        """Pick up new, changed and removed files.
+
+        Returns the set of tournaments whose data changed; subscribers are
+        told which (table, tournament) pairs did.
+        """
+        changed = self._refresh(force)
+        if changed:
+            for listener in list(self._listeners):
+                listener(changed)
+        return {tournament for _, tournament in changed}
+
+    def _refresh(self, force):
+        with self._lock:
+            now = time.monotonic()
+            if (not force and self._last_refresh is not None
+                    and now - self._last_refresh < self.refresh_interval):
+                return set()
+            self._last_refresh = now
+
+            sources = discover_sources(self.data_dir)
+            changed = set()
+
+            for key in list(self._sources):
+                if key not in sources:
+                    del self._sources[key]
+                    self._frames.pop(key, None)
+                    self._memory.pop(key, None)
+                    changed.add(key)
+
+            for key, path in sources.items():
+                st = os.stat(path)
+                known = self._sources.get(key)
+                if known and (known[1]['mtime'], known[1]['size']) == (st.st_mtime, st.st_size):
+                    continue
+                fingerprint = file_fingerprint(path)
+                if known and known[1]['sha1'] == fingerprint['sha1']:
+                    # Touched but identical; keep the frame we have.
+                    self._sources[key] = (path, fingerprint)
+                    continue
+                self._sources[key] = (path, fingerprint)
+                self._frames.pop(key, None)
+                self._memory.pop(key, None)
+                changed.add(key)
+
+            for table in {table for table, _ in changed}:
+                self._combined.pop(table, None)
+            return changed
+
+    def subscribe(self, listener):
+        """Call ``listener(changed)`` after every refresh that changes data."""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def watch(self, interval=None):
+        """Refresh every ``interval`` seconds in a daemon thread; idempotent.
+
+        Changes are then picked up, and subscribers told, even while no
+        page is being viewed. Polling only stats the files; a file is only
+        hashed when its mtime or size moves.
+        """
+        interval = self.refresh_interval if interval is None else interval
+        with self._lock:
+            if self._watcher is not None:
+                return self
+            self._watcher = threading.Thread(target=self._poll, args=(interval,),
+                                             name="data-watcher", daemon=True)
+        self._watcher.start()
+        return self
+
+    def _poll(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh(force=True)
+            except OSError as e:  # a file caught mid-write; the next poll retries
+                warnings.warn(f"Data refresh failed: {e}")
+
+    def _ingest(self, key, path, fingerprint):
+        """Load one source file, from its snapshot when that is still fresh."""
+        table, tournament = key
+        name = os.path.basename(path)
+        if self.use_snapshot:
+            recorded = read_manifest(self.data_dir).get(name)
+            if recorded and recorded['sha1'] == fingerprint['sha1']:
+                try:
+                    with telemetry.span('read_snapshot'):
+                        # Back onto the shared dictionaries, which a restart empties.
+                        df = schema.attach(table, read_snapshot(path, self.data_dir))
+                except (OSError, ValueError, pa.ArrowException):
+                    pass
+                else:
+                    self._memory[key] = (recorded.get('parsed_bytes'), schema.frame_bytes(df))
+                    return df
+
+        df = read_source(path, table, tournament)
+        parsed_bytes = schema.frame_bytes(df)
+        with telemetry.span('compact'):
+            schema.apply(table, df)
+        self._memory[key] = (parsed_bytes, schema.frame_bytes(df))
+        if self.use_snapshot:
+            try:
+                with telemetry.span('write_snapshot'):
+                    write_snapshot(df, path, self.data_dir)
+                manifest = read_manifest(self.data_dir)
+                manifest[name] = {**fingerprint, 'parsed_bytes': parsed_bytes}
+                write_manifest(manifest, self.data_dir)
+                # Serve the mapped copy, so this process shares pages with the others.
+                df = schema.attach(table, read_snapshot(path, self.data_dir))
+            except (OSError, pa.ArrowException) as e:
+                warnings.warn(f"Could not write data snapshot: {e}")
+        return df
+
+    def attach_live(self, tournament, feed):
+        """Serve ``tournament`` from a live feed's latest published snapshot."""
+        with self._lock:
+            self._live[tournament] = feed
+
+    def live_snapshot(self, tournament):
+        with self._lock:
+            return self._live[tournament].snapshot()
+
+    def live_feed(self, tournament):
+        with self._lock:
+            return self._live[tournament]
+
+    def tournaments(self):
+        # Live feeds list last, so they are the default selection.
+        with self._lock:
+            return sorted({tournament for _, tournament in self._sources},
+                          key=tournament_sort_key) + list(self._live)
+
+    def is_loaded(self, tournament, table):
+        with self._lock:
+            return (table, tournament) in self._frames
+
+    def table(self, tournament, table):
+        """One cleaned table, loaded on first use; a missing file gives an empty frame."""
+        key = (table, tournament)
+        with self._lock:
+            if tournament in self._live:
+                return self._live[tournament].snapshot().tables.get(table, pd.DataFrame())
+            if key not in self._frames:
+                if key not in self._sources:
+                    return pd.DataFrame()
+                self._frames[key] = self._ingest(key, *self._sources[key])
+            return self._frames[key]
+
+    def tables(self, tournament):
+        """Every cleaned table for one tournament (loads them all)."""
+        return {table: self.table(tournament, table) for table in TABLES}
+
+    def combined(self, table):
+        """One table across every tournament, rebuilt only after a change."""
+        with self._lock:
+            if table not in self._combined:
+                parts = [self.table(tournament, name) for name, tournament in sorted(self._sources)
+                         if name == table]
+                self._combined[table] = (pd.concat(parts, ignore_index=True)
+                                         if parts else pd.DataFrame())
+            return self._combined[table]
+
+    def memory_report(self):
+        """Parsed vs compact bytes of every loaded table, one row per table.
+
+        Compact bytes leave out the shared category dictionaries; add
+        ``schema.categories.nbytes()`` once for the total.
+        """
+        with self._lock:
+            rows = [{'Tournament': tournament, 'Table': table,
+                     'Parsed Bytes': parsed, 'Compact Bytes': compact}
+                    for (table, tournament), (parsed, compact) in sorted(self._memory.items())]
+        report = pd.DataFrame(rows, columns=['Tournament', 'Table', 'Parsed Bytes',
+                                             'Compact Bytes'])
+        report['Saved Bytes'] = report['Parsed Bytes'] - report['Compact Bytes']
+        return report
+
+    def table_version(self, tournament, table):
+        """Content hash of the source file behind one table ('' if missing)."""
+        with self._lock:
+            if tournament in self._live:
+                return self.version(tournament)
+            source = self._sources.get((table, tournament))
+        return source[1]['sha1'] if source else ''
+
+    def version(self, tournament, tables=None):
+        """Content hash of the source files behind one tournament.
+
+        With ``tables``, only of those tables, for caches that read no others.
+        """
+        h = hashlib.sha1()
+        with self._lock:
+            if tournament in self._live:
+                return f"live-{self._live[tournament].snapshot().version}"
+            for key in sorted(self._sources):
+                if key[1] == tournament and (tables is None or key[0] in tables):
+                    h.update(f"{key[0]}:{self._sources[key][1]['sha1']};".encode())
+        return h.hexdigest()
+
+
+if __name__ == "__main__":
+    if feather is None:
+        raise SystemExit("pyarrow is required to build the snapshot.")
+    store = DataStore()
+    store.refresh(force=True)
+    for tournament in store.tournaments():
+        store.tables(tournament)
+    report = store.memory_report()
+    print(f"Snapshot of {len(store.tournaments())} tournament(s) written to "
+          f"{_snapshot_dir(store.data_dir)}")
+    compact = report['Compact Bytes'].sum() + schema.categories.nbytes()
+    print(f"In memory: {compact / 2**20:.2f} MB "
+          f"(parsed: {report['Parsed Bytes'].sum() / 2**20:.2f} MB)")
@@ -0,0 +1,161 @@
+"""Player name normalisation, alias resolution and typeahead search.
+
+Scorecards spell the same player several ways: "V Kohli", "Virat Kohli",
+"RG Sharma", "Rohit Sharma". ``name_key`` reduces a name to its surname
+plus given-name initials ("kohli", "v"), and two spellings are the same
+player when they share a team and surname and one set of initials is a
+prefix of the other. A spelling that fits more than one player is left
+alone rather than guessed.
+
+``NameIndex`` is built once per data load. It holds every word of every
+spelling in one sorted array, so a prefix lookup is a binary search, plus
+a trigram posting list per name for typo-tolerant matches. Both are NumPy
+operations, well under a millisecond for tens of thousands of players.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def normalise(name):
+    """Lower-case ASCII words: "Aiden  Markram." -> "aiden markram"."""
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    return _NON_WORD.sub(' ', text).strip()
+
+
+def name_key(name):
+    """(surname, initials) of a name; initials are '' for a single word."""
+    words = re.sub(r"[^\w\s]", " ", unicodedata.normalize('NFKD', str(name))).split()
+    if not words:
+        return '', ''
+    initials = ''
+    for word in words[:-1]:
+        if word.islower():
+            continue    # particles such as "de" in "Q de Kock"
+        # "RG" is a run of initials; "Rohit" contributes its first letter.
+        initials += word.lower() if word.isupper() and len(word) <= 3 else word[0].lower()
+    return normalise(words[-1]), normalise(initials).replace(' ', '')
+
+
+def compatible(a, b):
+    """Whether two initials strings could belong to the same player."""
+    return bool(a) and bool(b) and (a.startswith(b) or b.startswith(a))
+
+
+def resolve_aliases(entries):
+    """Map every spelling in ``entries`` (name, team) to its canonical spelling.
+
+    The first spelling seen of each player is its canonical one, so pass the
+    most complete table first.
+    """
+    canonical = {}
+    by_key = defaultdict(list)      # (team, surname) -> [(initials, canonical name)]
+    for name, team in entries:
+        if name in canonical:
+            continue
+        surname, initials = name_key(name)
+        known = by_key[(team, surname)]
+        matches = {c for i, c in known if i == initials or compatible(i, initials)}
+        if len(matches) == 1:
+            canonical[name] = matches.pop()
+        else:
+            canonical[name] = name
+        known.append((initials, canonical[name]))
+    return canonical
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex:
+    """Prefix and trigram search over player names and their aliases."""
+
+    def __init__(self, spellings, min_similarity=0.4):
+        """``spellings`` maps each canonical name to all of its spellings."""
+        self.names = list(spellings)
+        self.min_similarity = min_similarity
+
+        words, owners = [], []
+        grams = defaultdict(set)
+        by_surname = defaultdict(set)
+        for i, name in enumerate(self.names):
+            variants = {normalise(v) for v in [name, *spellings[name]]}
+            for variant in variants:
+                for word in set(variant.split()):
+                    words.append(word)
+                    owners.append(i)
+                for gram in _trigrams(variant):
+                    grams[gram].add(i)
+            for variant in [name, *spellings[name]]:
+                surname, initials = name_key(variant)
+                by_surname[surname].add((initials, i))
+
+        order = np.argsort(words, kind='stable')
+        self._words = np.array(words, dtype=str)[order] if words else np.array([], dtype=str)
+        self._owners = np.array(owners, dtype=np.int64)[order]
+        self._grams = {gram: np.fromiter(ids, dtype=np.int64) for gram, ids in grams.items()}
+        self._by_surname = dict(by_surname)
+        # Display order of prefix hits: shorter names first, then alphabetical.
+        self._rank = np.empty(len(self.names), dtype=np.int64)
+        self._rank[sorted(range(len(self.names)),
+                          key=lambda i: (len(self.names[i]), self.names[i]))] = np.arange(len(self.names))
+
+    def __len__(self):
+        return len(self.names)
+
+    def _prefix(self, term):
+        lo = np.searchsorted(self._words, term, side='left')
+        hi = np.searchsorted(self._words, term + '\uffff', side='left')
+        return np.unique(self._owners[lo:hi])
+
+    def _fuzzy(self, text):
+        postings = [self._grams[g] for g in _trigrams(text) if g in self._grams]
+        if not postings:
+            return np.array([], dtype=np.int64), np.array([])
+        # Share of the query's trigrams found in the name, so a surname
+        # alone can still match a full name.
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.names))
+        similarity = shared / len(_trigrams(text))
+        found = np.flatnonzero(similarity >= self.min_similarity)
+        order = np.lexsort((self._rank[found], -similarity[found]))
+        return found[order], similarity[found[order]]
+
+    def search(self, query, limit=10):
+        """Up to ``limit`` canonical names for a typed query, best first.
+
+        Names where every typed word starts a word of some spelling come
+        first (shortest names first); close misspellings fill the rest.
+        """
+        text = normalise(query)
+        if not text or not self.names:
+            return []
+        hits = None
+        for term in text.split():
+            ids = self._prefix(term)
+            hits = ids if hits is None else np.intersect1d(hits, ids, assume_unique=True)
+        ranked = hits[np.argsort(self._rank[hits])][:limit].tolist()
+        if len(ranked) < limit:
+            seen = set(ranked)
+            fuzzy, _ = self._fuzzy(text)
+            ranked += [i for i in fuzzy.tolist() if i not in seen]
+        return [self.names[i] for i in ranked[:limit]]
+
+    def resolve(self, name):
+        """The one canonical name ``name`` can only refer to, else None.
+
+        Used for names typed or stored elsewhere, e.g. "Virat Kohli" when
+        the scorecards say "V Kohli"; teams are not known here, so the
+        surname and initials must single out one player.
+        """
+        surname, initials = name_key(name)
+        candidates = {i for known, i in self._by_surname.get(surname, ())
+                      if known == initials or compatible(known, initials)}
+        return self.names[candidates.pop()] if len(candidates) == 1 else None
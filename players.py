@@ -0,0 +1,160 @@
+"""Player lookup index built once per data load.
+
+Maps each player name to its row position in every stat table, so the
+player pages can pull a player's rows with ``iloc`` instead of scanning a
+whole table with a boolean mask on every selection.
+
+Names are resolved to one canonical spelling per player first (see
+names.py), so "Virat Kohli" in one table and "V Kohli" in another are the
+same player everywhere: the canonical name is the player's ID in every
+lookup, join and picker.
+"""
+from collections import defaultdict
+
+import numpy as np
+
+import names
+
+
+# Fields shown on the Single Player Deep Dive KPI cards, per table.
+PROFILE_FIELDS = {
+    'batting': ['Team', 'Runs', 'Ave', 'SR', 'HS', 'Runs/Inn', 'Balls/Out', 'Out/Inn'],
+    'bowling': ['Wkts', 'Ave', 'Econ', 'BBI', 'Balls/Wkt', 'Wkts/Mat', 'Adj Econ'],
+    'fielding': ['Ct', 'Ct/Mat'],
+    'wk': ['Dis', 'Ct', 'St', 'Dis/Mat'],
+}
+
+
+# (card title, field, format) of the Deep Dive KPI cards, per table; shared
+# by the dashboard and the report export.
+KPI_CARDS = {
+    'batting': [("Runs", 'Runs', '{}'), ("Batting Avg", 'Ave', '{:.2f}'),
+                ("Strike Rate", 'SR', '{:.2f}'), ("High Score", 'HS', '{}')],
+    'bowling': [("Wickets", 'Wkts', '{}'), ("Bowling Avg", 'Ave', '{:.2f}'),
+                ("Economy", 'Econ', '{:.2f}'), ("Best Bowling", 'BBI', '{}')],
+    'fielding': [("Catches", 'Ct', '{}')],
+    'wk': [("Dismissals", 'Dis', '{}'), ("Catches (WK)", 'Ct', '{}'), ("Stumpings", 'St', '{}')],
+}
+KPI_SECTIONS = {'batting': "Batting", 'bowling': "Bowling", 'fielding': "Fielding",
+                'wk': "Wicket-Keeping"}
+
+# (card title, table, field) of the Derived Metrics row (see derived.py).
+DERIVED_CARDS = [
+    ("Runs / Innings", 'batting', 'Runs/Inn'),
+    ("Dismissals / Innings", 'batting', 'Out/Inn'),
+    ("Balls / Wicket", 'bowling', 'Balls/Wkt'),
+    ("Maiden-Adj. Economy", 'bowling', 'Adj Econ'),
+]
+
+
+def kpi_cards(profile, table):
+    """(title, formatted value) cards for one table of a profile, or [] if absent."""
+    fields = profile.get(table)
+    if fields is None:
+        return []
+    return [(title, '-' if fields.get(field) is None else fmt.format(fields[field]))
+            for title, field, fmt in KPI_CARDS[table]]
+
+
+def derived_cards(profile, impact=None):
+    """Derived Metrics cards, plus the all-rounder impact score when given."""
+    values = [(title, profile[table].get(field)) for title, table, field in DERIVED_CARDS
+              if profile.get(table) is not None]
+    if impact is not None:
+        values.append(("All-Rounder Impact", impact))
+    return [(title, '-' if value is None or value != value else f"{value:.2f}")
+            for title, value in values]
+
+
+def _plain(value):
+    # numpy scalars -> Python numbers, missing values -> None
+    if isinstance(value, np.float32):
+        # Shortest repr, so a float32 34.33 comes out as 34.33, not 34.330001...
+        value = float(str(value))
+    elif hasattr(value, 'item'):
+        value = value.item()
+    return None if value is None or value != value else value
+
+
+class PlayerIndex:
+    """Row positions of every player across the stat tables."""
+
+    # Tables the index is built from, and those whose players are offered
+    # in the player pickers.
+    TABLES = ('batting', 'bowling', 'fielding', 'wk')
+    LISTED_TABLES = ('batting', 'bowling')
+
+    def __init__(self, tables):
+        # Tables come batting first, so its spellings become the canonical ones.
+        listed = {table: (df['Player'].tolist(), df['Team'].tolist() if 'Team' in df.columns
+                          else [None] * len(df))
+                  for table, df in tables.items() if 'Player' in df.columns}
+        self.aliases = names.resolve_aliases(
+            entry for players, teams in listed.values() for entry in zip(players, teams))
+
+        self.positions = {}
+        for table, (players, _) in listed.items():
+            for pos, name in enumerate(players):
+                # Keep the first row, as the pages did with .values[0].
+                self.positions.setdefault(self.aliases[name], {}).setdefault(table, pos)
+
+        self.players = sorted(name for name, found in self.positions.items()
+                              if any(table in found for table in self.LISTED_TABLES))
+        self._order = {name: i for i, name in enumerate(self.players)}
+
+        spellings = defaultdict(list)
+        for alias, name in self.aliases.items():
+            spellings[name].append(alias)
+        self.search_index = names.NameIndex({name: spellings[name] for name in self.players})
+
+    def resolve(self, name):
+        """Canonical spelling of ``name``, or None if it matches no single player."""
+        if name in self.positions:
+            return name
+        if name in self.aliases:
+            return self.aliases[name]
+        return self.search_index.resolve(name)
+
+    def canonical(self, values):
+        """Canonical spelling of every name in ``values``, as an array."""
+        return np.array([self.aliases.get(name, name) for name in values], dtype=object)
+
+    def search(self, query, limit=10):
+        """Typeahead: listed players matching ``query``, best first."""
+        return self.search_index.search(query, limit)
+
+    def __contains__(self, name):
+        return self.resolve(name) in self._order
+
+    def locate(self, name):
+        """{table: row position} for a player, under any spelling."""
+        return self.positions.get(self.resolve(name), {})
+
+    def index_of(self, name, default=0):
+        """Position of ``name`` in ``players``, for selectbox defaults."""
+        return self._order.get(self.resolve(name), default)
+
+    def present(self, names):
+        """Canonical spellings of the listed players among ``names``."""
+        found = (self.resolve(name) for name in names)
+        return list(dict.fromkeys(name for name in found if name in self._order))
+
+    def select(self, df, table, names):
+        """Rows of ``df`` (the frame indexed as ``table``) for ``names``, in table order."""
+        rows = sorted({self.locate(name)[table] for name in names
+                       if table in self.locate(name)})
+        return df.iloc[rows]
+
+    def profile(self, tables, name):
+        """Deep Dive KPI values for one player, one dict per table (None if absent)."""
+        name = self.resolve(name) or name
+        profile = {'player': name}
+        for table, fields in PROFILE_FIELDS.items():
+            rows = self.select(tables[table], table, [name]) if table in tables else None
+            # Players who never bowled a ball have no bowling card.
+            if rows is None or rows.empty or (table == 'bowling' and rows['Balls'].iloc[0] <= 0):
+                profile[table] = None
+                continue
+            row = rows.iloc[0]
+            profile[table] = {field: _plain(row[field]) for field in fields if field in row.index}
+        return profile
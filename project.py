@@ -1,12 +1,32 @@
+import concurrent.futures
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import seaborn as sns
-import matplotlib.pyplot as plt
 import numpy as np
 
+import charts
+import comparison
+import derived
+import leaderboards
+import live
+import loader
+import players
+import queries
+import schema
+import simulation
+import tableview
+import telemetry
+import vegalite
+
 
 st.set_page_config(layout="wide", page_title="T20 World Cup Analysis")
 
+# With T20_PROFILE set, each rerun is timed section by section (see telemetry.py).
+telemetry.start_run()
+telemetry.section("setup")
+
 #  Step 1: Add  CSS and HTML
 # (No changes in this section)
 st.markdown("""
@@ -60,64 +80,207 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 #  1.5. SEABORN & MATPLOTLIB  CONFIG 
-# (No changes in this section)
-sns.set_theme(style="darkgrid")
-plt.rcParams['figure.facecolor'] = '#252525'  
-plt.rcParams['axes.facecolor'] = '#252525'    
-plt.rcParams['text.color'] = '#E0E0E0'        
-plt.rcParams['axes.labelcolor'] = '#E0E0E0'  
-plt.rcParams['xtick.color'] = '#E0E0E0'       
-plt.rcParams['ytick.color'] = '#E0E0E0'       
-plt.rcParams['axes.titlecolor'] = "#10F5D6"  
-plt.rcParams['figure.dpi'] = 100              
-
-
-#  2. DATA LOADING & CLEANING (FROM CSVs) 
-# (No changes in this section)
-@st.cache_data
-def load_data():
+# Theme colours live in charts.THEME_RC so cached and headless renders match.
+charts.apply_theme()
+
+
+# Charts are drawn in the browser from Vega-Lite specs, so hovering, zooming
+# and legend toggles never rerun the script. T20_CHART_BACKEND=matplotlib
+# switches back to server-rendered PNGs.
+CHART_BACKEND = os.environ.get("T20_CHART_BACKEND", "vega")
+
+
+def show_chart(page, kind, data, tables, **opts):
+    # The figure is tagged with the tables its data came from, so a new file
+    # evicts only the figures drawn from it.
+    tags = {(table, tournament) for table in tables}
+    with telemetry.phase('render'):
+        if CHART_BACKEND == "vega" and kind in vegalite.SPECS:
+            with telemetry.span('vega_spec'):
+                frame, spec = vegalite.chart_spec(kind, data, **opts)
+            with telemetry.span('vega_chart'):
+                st.vega_lite_chart(frame, spec, use_container_width=True, theme=None)
+            # Matplotlib stays the export path; the PNG is only drawn on click.
+            st.download_button("Download PNG",
+                               lambda: charts.render_chart(page, kind, data, tags=tags, **opts),
+                               file_name=f"{opts.get('title', kind)}.png", mime="image/png",
+                               key=f"export-{kind}-{opts.get('title', '')}",
+                               on_click="ignore", type="tertiary")
+        else:
+            # Cache misses are drawn in the render pool; the slot is filled
+            # by finish_charts() once every chart on the page is dispatched.
+            slot = st.empty()
+            slot.caption("Rendering chart…")
+            with telemetry.span('submit'):
+                future = charts.render_scheduler.submit(page, kind, data, tags=tags, **opts)
+            pending_charts.append((slot, future, (page, kind, data, tags, opts)))
+
+
+# (slot, future, spec) of charts still being drawn on this run
+pending_charts = []
+
+
+def finish_charts():
+    with telemetry.phase('render'):
+        futures = {future: (slot, spec) for slot, future, spec in pending_charts}
+        try:
+            for future in concurrent.futures.as_completed(futures, timeout=charts.RENDER_TIMEOUT):
+                show_finished_chart(*futures.pop(future), future)
+        except concurrent.futures.TimeoutError:
+            # A worker died without a word. The pool is shared by every
+            # session and replaces dead workers itself, so leave it running:
+            # stop waiting on this run's futures and draw what is left here.
+            for slot, spec in futures.values():
+                show_finished_chart(slot, spec, None)
+        pending_charts.clear()
+
+
+def show_finished_chart(slot, spec, future):
+    page, kind, data, tags, opts = spec
     try:
-        # Load all datasets (use actual filenames in this workspace)
-        batting_df = pd.read_csv("batting_stats_for_icc_mens_t20_world_cup_2024.csv")
-        bowling_df = pd.read_csv("bowling_stats_for_icc_mens_t20_world_cup_2024.csv")
-        fielding_df = pd.read_csv("fielding_stats_for_icc_mens_t20_world_cup_2024.csv")
-        match_df = pd.read_csv("match_results_for_icc_mens_t20_world_cup_2024.csv")
-        wk_df = pd.read_csv("wk_stats_for_icc_mens_t20_world_cup_2024.csv")
-
-        
-        batting_df['HS'] = batting_df['HS'].astype(str).str.replace('*', '', regex=False)
-        bat_num_cols = ['Runs', 'Ave', 'SR', '100', '50', '0', 'HS']
-        for col in bat_num_cols:
-            batting_df[col] = pd.to_numeric(batting_df[col], errors='coerce').fillna(0)
-
-        
-        bowl_num_cols = ['Balls', 'Mdns', 'Runs', 'Wkts', 'Ave', 'Econ', 'SR']
-        for col in bowl_num_cols:
-            bowling_df[col] = pd.to_numeric(bowling_df[col], errors='coerce').fillna(0)
-
-        
-        match_df = match_df[match_df['Winner'] != 'no result']
-        match_df = match_df[match_df['Winner'] != 'tied']
-        
-        
-        fielding_df['Ct'] = pd.to_numeric(fielding_df['Ct'], errors='coerce').fillna(0)
-        
-        
-        wk_cols = ['Dis', 'Ct', 'St']
-        for col in wk_cols:
-            wk_df[col] = pd.to_numeric(wk_df[col], errors='coerce').fillna(0)
+        image = future.result() if future is not None else None
+        # Drawn in the render pool: add the worker's own draw/encode timings.
+        telemetry.add_spans(getattr(future, 'worker_spans', None), 'worker')
+    except Exception:
+        # A crashed worker should not take the chart with it.
+        image = None
+    if image is None:
+        image = charts.render_chart(page, kind, data, tags=tags, **opts)
+    with telemetry.span('image'):
+        slot.image(image, use_container_width=True)
 
-        return batting_df, bowling_df, fielding_df, match_df, wk_df
-    
-    except FileNotFoundError:
-        st.error("One or more CSV files not found. Please make sure all 5 files are in the same directory.")
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
 
+def show_kpi_cards(cards, min_columns=1):
+    """One row of KPI cards from (title, formatted value) pairs."""
+    for col, (title, value) in zip(st.columns(max(len(cards), min_columns)), cards):
+        with col:
+            st.markdown(f"""<div class="kpi-card"><div class="kpi-title">{title}</div><div class="kpi-value">{value}</div></div>""", unsafe_allow_html=True)
 
-batting_stats, bowling_stats, fielding_stats, match_results, wk_stats = load_data()
 
-
-all_players = sorted(list(set(batting_stats['Player'].unique()) | set(bowling_stats['Player'].unique())))
+#  2. DATA LOADING & CLEANING (FROM CSVs) 
+# Discovery, parsing and cleaning live in loader.py. The store is shared by
+# every session; refresh() only picks up stat files that are new or changed,
+# and each table is parsed the first time a page asks for it.
+# Setting T20_LIVE_FEED (a JSON Lines file or tcp://host:port) adds a "Live"
+# tournament fed ball by ball; see live.py.
+# The store polls the folder in the background, and a changed table drops
+# only the figures drawn from it.
+@st.cache_resource
+def get_data_store():
+    store = loader.DataStore()
+    feed_spec = os.environ.get(live.LIVE_FEED_ENV)
+    if feed_spec:
+        store.attach_live(live.LIVE_TOURNAMENT, live.LiveFeed(feed_spec).start())
+    store.subscribe(charts.figure_cache.evict)
+    return store.watch()
+
+
+def version_of(*tables):
+    """Data version of just ``tables``, for caches that read no others."""
+    return data_store.version(tournament, tables)
+
+
+# Built once per version of the tables they read and shared by every
+# session (read-only), so a new batting file leaves the match-only caches
+# warm. A live feed publishes a new version every few balls, hence the
+# bounds on these caches.
+@st.cache_resource(max_entries=16)
+def load_player_index(tournament, version):
+    return players.PlayerIndex({table: data_store.table(tournament, table)
+                                for table in players.PlayerIndex.TABLES})
+
+
+# One per tournament: each aggregate is memoised against the versions of
+# the tables it reads and recomputed only when one of them changes.
+@st.cache_resource(max_entries=16)
+def load_queries(tournament):
+    return queries.StatsQueries(lambda table: data_store.table(tournament, table),
+                                table_version=lambda table: data_store.table_version(tournament, table))
+
+
+# All-rounder impact joins batting and bowling on the player index's
+# canonical names, so it is keyed on the index's version.
+@st.cache_resource(max_entries=16)
+def load_impact(tournament, version):
+    return derived.impact(data_store.table(tournament, 'batting'),
+                          data_store.table(tournament, 'bowling'),
+                          load_player_index(tournament, version).canonical)
+
+
+# Every ranking is argsorted once per version of its table; pages only slice it.
+@st.cache_resource(max_entries=16)
+def load_leaderboards(tournament):
+    return leaderboards.LeaderboardSet(lambda table: data_store.table(tournament, table),
+                                       table_version=lambda table: data_store.table_version(tournament, table))
+
+
+# Normalised batting/bowling vectors for the Multi-Player Comparison view,
+# keyed on the player index's canonical names (and so on its version).
+@st.cache_resource(max_entries=16)
+def load_comparison(tournament, version):
+    return comparison.ComparisonEngine(lambda table: data_store.table(tournament, table),
+                                       load_player_index(tournament, version).canonical)
+
+
+# Team ratings and simulated stage odds, per version of the results and run size.
+# Odds are None when there are too few teams to simulate.
+@st.cache_resource(max_entries=16)
+def load_simulation(tournament, version, n_simulations):
+    ratings = simulation.fit_ratings(data_store.table(tournament, 'matches'))
+    if len(ratings) < simulation.MIN_TEAMS:
+        return ratings, None
+    odds = simulation.simulate(ratings, simulation.tournament_format(tournament, ratings),
+                               n=n_simulations)
+    return ratings, odds
+
+
+# Sort orders for the full stat tables, built once per version of the table.
+@st.cache_resource(max_entries=16)
+def load_table_view(tournament, version, table):
+    return tableview.TableView(data_store.table(tournament, table),
+                               tableview.DEFAULT_SORT.get(table))
+
+
+def show_table(table):
+    """A full stat table, sorted and filtered server-side and sent one page at a time."""
+    view = load_table_view(tournament, data_store.table_version(tournament, table), table)
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        search = st.text_input("Search player or team", key=f"{table}-search")
+    with col2:
+        team = st.selectbox("Team", ["All teams"] + view.teams, key=f"{table}-team")
+    with col3:
+        sort_by = st.selectbox("Sort by", view.columns, key=f"{table}-sort",
+                               index=view.columns.index(view.default_sort))
+    with col4:
+        descending = st.toggle("Descending", value=True, key=f"{table}-desc")
+
+    with telemetry.span('filter'):
+        rows = view.rows(sort_by, descending, None if team == "All teams" else team, search)
+    pages = tableview.page_count(len(rows))
+    # A narrower filter can leave the remembered page past the end.
+    if st.session_state.get(f"{table}-page", 1) > pages:
+        st.session_state[f"{table}-page"] = pages
+    number = st.number_input("Page", min_value=1, max_value=pages, step=1, key=f"{table}-page")
+    with telemetry.span('dataframe'):
+        st.dataframe(view.page(rows, number), use_container_width=True, hide_index=True)
+    start = (number - 1) * tableview.PAGE_SIZE
+    st.caption(f"Rows {min(start + 1, len(rows))}–{min(start + tableview.PAGE_SIZE, len(rows))} "
+               f"of {len(rows)} (page {number} of {pages})")
+
+
+def get_table(table):
+    if tournament is None:
+        return pd.DataFrame()
+    with telemetry.phase('load'):
+        # Read-only frames over the shared snapshot; sessions never get a copy.
+        return data_store.table(tournament, table)
+
+
+with telemetry.phase('load'):
+    data_store = get_data_store()
+    data_store.refresh()
+    tournaments = data_store.tournaments()
 
 # 3. SIDEBAR NAVIGATION
 # --- START OF MODIFIED SECTION ---
@@ -128,9 +291,83 @@ page = st.sidebar.radio(
      "🏏 Batting Analysis", 
      "⚾ Bowling Analysis", 
      "🧤 Fielding & WK Analysis", 
-     "👤 Player Analysis"] 
+     "👤 Player Analysis",
+     "🎲 Tournament Simulator"] 
 )
 
+# Newest edition first; the picker only shows up once there is a choice.
+tournament = None
+if len(tournaments) > 1:
+    tournament = st.sidebar.selectbox(
+        "Tournament",
+        tournaments[::-1],
+        format_func=loader.tournament_label
+    )
+elif tournaments:
+    tournament = tournaments[0]
+
+if tournament is not None:
+    data_version = data_store.version(tournament)
+    stats_queries = load_queries(tournament)
+    boards = load_leaderboards(tournament)
+else:
+    st.error("No stat CSV files found. Please make sure the files are in the same directory as project.py.")
+    data_version = None
+    stats_queries = None
+    boards = None
+
+# While a live tournament is selected, poll its feed and rerun the page as
+# soon as a new snapshot is published.
+if tournament == live.LIVE_TOURNAMENT:
+    @st.fragment(run_every=live.POLL_INTERVAL)
+    def watch_live_feed():
+        if data_store.version(tournament) != data_version:
+            st.rerun()
+        snapshot = data_store.live_snapshot(tournament)
+        st.caption(f"Live: {snapshot.version} events, updated {time.strftime('%H:%M:%S', time.localtime(snapshot.published_at))}")
+        feed = data_store.live_feed(tournament)
+        if not feed.running and feed.error is not None:
+            st.error(f"Live feed stopped: {feed.error}")
+        elif feed.skipped:
+            st.warning(f"{feed.skipped} malformed event(s) skipped; last: {feed.error}")
+
+    with st.sidebar:
+        watch_live_feed()
+
+# Only the tables the active page shows are loaded; Player Analysis loads
+# its own below, depending on the view.
+PAGE_TABLES = {
+    "🏆 Tournament Summary": ('batting', 'bowling', 'matches'),
+    "🏏 Batting Analysis": ('batting',),
+    "⚾ Bowling Analysis": ('bowling',),
+    "🧤 Fielding & WK Analysis": ('fielding', 'wk'),
+    "👤 Player Analysis": (),
+    "🎲 Tournament Simulator": ('matches',),
+}
+telemetry.section("load tables")
+page_tables = {table: get_table(table) for table in PAGE_TABLES[page]}
+batting_stats = page_tables.get('batting')
+bowling_stats = page_tables.get('bowling')
+fielding_stats = page_tables.get('fielding')
+match_results = page_tables.get('matches')
+wk_stats = page_tables.get('wk')
+
+# Tables whose changes reach this page.
+watched_tables = PAGE_TABLES[page] or players.PlayerIndex.TABLES
+
+# The store's watcher picks up changed files; rerun once this page's own
+# tables change, without waiting for the next click.
+if tournament is not None and tournament != live.LIVE_TOURNAMENT:
+    page_version = version_of(*watched_tables)
+
+    @st.fragment(run_every=data_store.refresh_interval)
+    def watch_data_files():
+        if version_of(*watched_tables) != page_version:
+            st.rerun()
+
+    with st.sidebar:
+        watch_data_files()
+
 
 st.sidebar.markdown("---")
 # Replaced captions with centered markdown for a symmetrical look
@@ -154,6 +391,8 @@ if page == "🏆 Tournament Summary" and not batting_stats.empty and not bowling
     st.title("T20 World Cup - Tournament Summary")
     st.markdown("A top-level overview of the tournament stats.")
 
+    telemetry.section("highlights")
+
     # --- KPI Cards ---
     st.markdown("### Tournament Highlights")
     total_runs = int(batting_stats['Runs'].sum())
@@ -177,65 +416,31 @@ if page == "🏆 Tournament Summary" and not batting_stats.empty and not bowling
     col1, col2 = st.columns(2)
 
     with col1:
+        telemetry.section("top run scorers")
         st.subheader("Top 5 Run Scorers")
-        top_5_runs = batting_stats.nlargest(5, 'Runs')
-        
-        # Create Matplotlib figure
-        fig_runs, ax = plt.subplots()
-        # Create Seaborn bar plot
-        sns.barplot(data=top_5_runs, 
-                    x='Runs', 
-                    y='Player', 
-                    palette=["#4C8FFB"], 
-                    ax=ax)
-        ax.set_title("Top 5 Run Scorers")
-        ax.set_xlabel("Total Runs")
-        ax.set_ylabel("Player")
-        plt.tight_layout()
-        st.pyplot(fig_runs)
+        top_5_runs = boards.top('runs', 5)[['Player', 'Runs']]
+        show_chart(page, 'bar', top_5_runs, ['batting'],
+                   x='Runs', y='Player', palette=["#4C8FFB"],
+                   title="Top 5 Run Scorers", xlabel="Total Runs", ylabel="Player")
         
     with col2:
+        telemetry.section("top wicket takers")
         st.subheader("Top 5 Wicket Takers")
-        top_5_wickets = bowling_stats.nlargest(5, 'Wkts')
-        
-        fig_wickets, ax = plt.subplots()
-        sns.barplot(data=top_5_wickets, 
-                    x='Wkts', 
-                    y='Player', 
-                    palette=["#00BFA5"], 
-                    ax=ax)
-        ax.set_title("Top 5 Wicket Takers")
-        ax.set_xlabel("Total Wickets")
-        ax.set_ylabel("Player")
-        plt.tight_layout()
-        st.pyplot(fig_wickets)
+        top_5_wickets = boards.top('wickets', 5)[['Player', 'Wkts']]
+        show_chart(page, 'bar', top_5_wickets, ['bowling'],
+                   x='Wkts', y='Player', palette=["#00BFA5"],
+                   title="Top 5 Wicket Takers", xlabel="Total Wickets", ylabel="Player")
 
     #  Team Wins Graph 
+    telemetry.section("team wins")
     st.subheader("Matches Won by Team (Top 10)")
-    team_wins = match_results['Winner'].value_counts().nlargest(10).reset_index()
-    team_wins.columns = ['Team', 'Wins']
-    
-    fig_wins, ax = plt.subplots()
-   
-    colors = sns.color_palette("coolwarm", len(team_wins))
-    
-    # Create the pie chart
-    wedges, texts, autotexts = ax.pie(team_wins['Wins'], 
-                                      labels=team_wins['Team'], 
-                                      autopct='%1.1f%%', 
-                                      colors=colors, 
-                                      startangle=90, 
-                                      pctdistance=0.85,
-                                      textprops={'color': 'white'})
-    
-    
-    centre_circle = plt.Circle((0,0),0.70,fc='#252525')
-    fig_wins.gca().add_artist(centre_circle)
-    
-    ax.set_title("Team Win Distribution (Top 10)")
-    ax.axis('equal') 
-    plt.tight_layout()
-    st.pyplot(fig_wins)
+    team_wins = stats_queries.top_winners(10)
+    if team_wins.empty:
+        st.info("No match results for this tournament.")
+    else:
+        show_chart(page, 'donut', team_wins, ['matches'],
+                   values='Wins', labels='Team', palette="coolwarm",
+                   title="Team Win Distribution (Top 10)")
 
 #  5. PAGE: BATTING ANALYSIS 
 #  Updated 'elif' statement to match the new emoji label
@@ -244,42 +449,25 @@ elif page == "🏏 Batting Analysis" and not batting_stats.empty:
     st.markdown("Detailed batting statistics and player comparisons.")
 
     #  Scatter Plot: Ave vs SR 
+    telemetry.section("ave vs sr")
     st.subheader("Average vs. Strike Rate (Min. 50 Runs)")
-    filtered_batters = batting_stats[batting_stats['Runs'] >= 50]
-    
-    fig_scatter, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(data=filtered_batters, 
-                    x='Ave', 
-                    y='SR',
-                    size='Runs',
-                    hue='Team',
-                    palette='bright', 
-                    sizes=(20, 500), 
-                    ax=ax)
-    ax.set_title("Player Performance (Avg vs. SR)")
-    
-    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
-    st.pyplot(fig_scatter)
+    with telemetry.span('filter'):
+        filtered_batters = batting_stats[batting_stats['Runs'] >= 50][['Player', 'Team', 'Runs', 'Ave', 'SR']]
+    show_chart(page, 'scatter', filtered_batters, ['batting'],
+               x='Ave', y='SR', size='Runs', hue='Team',
+               title="Player Performance (Avg vs. SR)")
 
     #  Bar Chart: Top 10 High Scores 
+    telemetry.section("high scores")
     st.subheader("Top 10 Individual High Scores")
-    top_10_hs = batting_stats.nlargest(10, 'HS')
-    
-    fig_hs, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(data=top_10_hs, 
-                x='HS',
-                y='Player',
-                palette='viridis', 
-                ax=ax)
-    ax.set_title("Top 10 High Scores")
-    ax.set_xlabel("High Score")
-    ax.set_ylabel("Player")
-    plt.tight_layout()
-    st.pyplot(fig_hs)
+    top_10_hs = boards.top('high_score', 10)[['Player', 'HS']]
+    show_chart(page, 'bar', top_10_hs, ['batting'],
+               x='HS', y='Player', palette='viridis', figsize=(10, 6),
+               title="Top 10 High Scores", xlabel="High Score", ylabel="Player")
     
+    telemetry.section("full batting stats")
     st.subheader("Full Batting Stats")
-    st.dataframe(batting_stats, use_container_width=True)
+    show_table('batting')
 
 
 #  6. PAGE: BOWLING ANALYSIS 
@@ -289,41 +477,27 @@ elif page == "⚾ Bowling Analysis" and not bowling_stats.empty:
     st.markdown("Detailed bowling statistics and player comparisons.")
 
     #  Dot Plot (Scatter): Wickets vs. Economy 
+    telemetry.section("wkts vs econ")
     st.subheader("Wickets vs. Economy Rate (Min. 5 Wickets)")
-    filtered_bowlers = bowling_stats[bowling_stats['Wkts'] >= 5]
-    
-    fig_dot, ax = plt.subplots(figsize=(10, 6))
-    sns.scatterplot(data=filtered_bowlers, 
-                    x='Econ', 
-                    y='Wkts',
-                    size='Ave',
-                    hue='Team',
-                    palette='bright',
-                    sizes=(20, 500), 
-                    ax=ax)
-    ax.set_title("Player Performance (Wkts vs. Econ)")
-    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
-    plt.tight_layout()
-    st.pyplot(fig_dot)
+    with telemetry.span('filter'):
+        filtered_bowlers = bowling_stats[bowling_stats['Wkts'] >= 5][['Player', 'Team', 'Wkts', 'Econ', 'Ave']]
+    show_chart(page, 'scatter', filtered_bowlers, ['bowling'],
+               x='Econ', y='Wkts', size='Ave', hue='Team',
+               title="Player Performance (Wkts vs. Econ)")
 
     #  Histogram: Distribution of Economy Rates 
+    telemetry.section("economy distribution")
     st.subheader("Distribution of Economy Rates (Min. 10 Overs)")
-    hist_bowlers = bowling_stats[bowling_stats['Balls'] >= 60]
-    
-    fig_hist, ax = plt.subplots()
-    sns.histplot(data=hist_bowlers, 
-               x='Econ', 
-               bins=20, 
-               kde=True, 
-               color="#FFD700", 
-               ax=ax)
-    ax.set_title("Economy Rate Distribution (Min. 10 Overs Bowled)")
-    ax.set_xlabel("Economy Rate")
-    plt.tight_layout()
-    st.pyplot(fig_hist)
+    with telemetry.span('filter'):
+        hist_bowlers = bowling_stats[bowling_stats['Balls'] >= 60][['Econ']]
+    show_chart(page, 'hist', hist_bowlers, ['bowling'],
+               x='Econ', color="#FFD700",
+               title="Economy Rate Distribution (Min. 10 Overs Bowled)",
+               xlabel="Economy Rate")
     
+    telemetry.section("full bowling stats")
     st.subheader("Full Bowling Stats")
-    st.dataframe(bowling_stats, use_container_width=True)
+    show_table('bowling')
 
 
 # 7. PAGE: FIELDING & WICKET-KEEPING ANALYSIS 
@@ -336,96 +510,38 @@ elif page == "🧤 Fielding & WK Analysis" and not fielding_stats.empty and not
 
     with col1:
         #  Fielding Stats
+        telemetry.section("top fielders")
         st.subheader("Top 10 Fielders (by Catches)")
-        top_10_fielders = fielding_stats.nlargest(10, 'Ct')
-        
-        fig_field, ax = plt.subplots()
-        # Create a color palette
-        colors = sns.color_palette("YlOrBr_r", len(top_10_fielders))
-        
-        # Create the pie chart
-        wedges, texts, autotexts = ax.pie(top_10_fielders['Ct'], 
-                                            labels=top_10_fielders['Player'], 
-                                            autopct='%1.1f%%', 
-                                            colors=colors, 
-                                            startangle=90, 
-                                            pctdistance=0.85,
-                                            textprops={'color': 'white'})
-        
-        # Create the "donut hole"
-        centre_circle = plt.Circle((0,0),0.70,fc='#252525')
-        fig_field.gca().add_artist(centre_circle)
-        
-        ax.set_title("Top 10 Fielders by Catches")
-        ax.axis('equal') 
-        plt.tight_layout()
-        st.pyplot(fig_field)
+        top_10_fielders = boards.top('catches', 10)[['Player', 'Ct']]
+        show_chart(page, 'donut', top_10_fielders, ['fielding'],
+                   values='Ct', labels='Player', palette="YlOrBr_r",
+                   title="Top 10 Fielders by Catches")
 
     with col2:
         #  Wicket-Keeping Stats 
+        telemetry.section("top wicket-keepers")
         st.subheader("Top 10 Wicket-Keepers (by Dismissals)")
-        top_10_wk = wk_stats.nlargest(10, 'Dis')
-        
-        fig_wk_dis, ax = plt.subplots()
-    
-        colors = sns.color_palette("PuBu_r", len(top_10_wk))
-
-        
-        wedges, texts, autotexts = ax.pie(top_10_wk['Dis'], 
-                                            labels=top_10_wk['Player'], 
-                                            autopct='%1.1f%%', 
-                                            colors=colors, 
-                                            startangle=90, 
-                                            pctdistance=0.85,
-                                            textprops={'color': 'white'})
-        
-        
-        centre_circle = plt.Circle((0,0),0.70,fc='#252525')
-        fig_wk_dis.gca().add_artist(centre_circle)
-
-        ax.set_title("Top 10 Wicket-Keepers by Dismissals")
-        ax.axis('equal') 
-        plt.tight_layout()
-        st.pyplot(fig_wk_dis)
+        top_10_wk = boards.top('dismissals', 10)[['Player', 'Dis', 'Ct', 'St']]
+        show_chart(page, 'donut', top_10_wk, ['wk'],
+                   values='Dis', labels='Player', palette="PuBu_r",
+                   title="Top 10 Wicket-Keepers by Dismissals")
 
     st.markdown("<br>", unsafe_allow_html=True)
     
     #  WK Dismissal Breakdown 
+    telemetry.section("wk breakdown")
     st.subheader("Wicket-Keeper Dismissal Breakdown (Top 10)")
-    
-    top_10_wk_melted = top_10_wk.melt(
-        id_vars=['Player'], 
-        value_vars=['Ct', 'St'], 
-        var_name='Dismissal Type', 
-        value_name='Count'
-    )
-    
-    top_10_wk_melted['Dismissal Type'] = pd.Categorical(top_10_wk_melted['Dismissal Type'], ["Ct", "St"])
-    
-    fig_wk_stack, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(data=top_10_wk_melted,
-                y='Player',
-                x='Count',
-                hue='Dismissal Type',
-                palette=["#4C8FFB", "#00BFA5"], 
-                ax=ax,
-                order=top_10_wk['Player'] 
-                )
-    ax.set_title("Dismissal Breakdown (Catches vs. Stumpings)")
-    ax.set_xlabel("Count")
-    ax.set_ylabel("Player")
-    ax.legend(title='Dismissal Type')
-    plt.tight_layout()
-    st.pyplot(fig_wk_stack)
+    show_chart(page, 'wk_breakdown', top_10_wk, ['wk'])
     
     st.markdown("<br>", unsafe_allow_html=True)
 
 
+    telemetry.section("full wk and fielding stats")
     st.subheader("Full Wicket-Keeping Stats")
-    st.dataframe(wk_stats, use_container_width=True)
+    show_table('wk')
     
     st.subheader("Full Fielding Stats")
-    st.dataframe(fielding_stats, use_container_width=True)
+    show_table('fielding')
 
 
 #  8. PAGE: PLAYER ANALYSIS (STAR PLAYERS) 
@@ -434,6 +550,14 @@ elif page == "👤 Player Analysis":
     st.title("Player Analysis")
     st.markdown("Select a player for a deep dive or compare multiple players.")
 
+    telemetry.section("player index")
+    if tournament is not None:
+        with telemetry.phase('load'):
+            player_index = load_player_index(tournament, version_of(*players.PlayerIndex.TABLES))
+    else:
+        player_index = players.PlayerIndex({})
+    all_players = player_index.players
+
    
     analysis_mode = st.radio(
         "Select View",
@@ -443,86 +567,60 @@ elif page == "👤 Player Analysis":
     
     st.markdown("---") 
     if analysis_mode == "Single Player Deep Dive":
+        telemetry.section("deep dive")
+        batting_stats = get_table('batting')
+        bowling_stats = get_table('bowling')
+        fielding_stats = get_table('fielding')
+        wk_stats = get_table('wk')
+
         # --- Player Selection Dropdown ---
-        
-        default_index = 0
-        if "Virat Kohli" in all_players:
-            default_index = all_players.index("Virat Kohli")
+        # Typing narrows the list with the fuzzy name index (any spelling,
+        # initials or small typos); an empty box lists everyone.
+        query = st.text_input("Search players", placeholder="e.g. kohli, rg sharma, bumra")
+        with telemetry.span('search'):
+            matches = player_index.search(query, limit=25) if query.strip() else []
+        if query.strip() and not matches:
+            st.caption(f"No players match \"{query}\".")
+        options = matches or all_players
+        default_index = 0 if matches else player_index.index_of("Virat Kohli")
             
         selected_player = st.selectbox(
             "Select a Player", 
-            all_players, 
+            options, 
             index=default_index
         )
         
-        #  Define player dataframes based on selection 
-        player_batting = batting_stats[batting_stats['Player'] == selected_player]
-        player_bowling = bowling_stats[bowling_stats['Player'] == selected_player]
-        player_fielding = fielding_stats[fielding_stats['Player'] == selected_player]
-        player_wk = wk_stats[wk_stats['Player'] == selected_player] 
+        # KPI values for every table, via the player index (any spelling resolves).
+        profile = player_index.profile({'batting': batting_stats, 'bowling': bowling_stats,
+                                        'fielding': fielding_stats, 'wk': wk_stats},
+                                       selected_player)
 
         st.subheader(f"Stats for: {selected_player}")
 
-        # --- Batting Stats ---
-        if not player_batting.empty:
-            st.markdown("#### Batting")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Runs</div><div class="kpi-value">{player_batting['Runs'].values[0]}</div></div>""", unsafe_allow_html=True)
-            with col2:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Batting Avg</div><div class="kpi-value">{player_batting['Ave'].values[0]:.2f}</div></div>""", unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Strike Rate</div><div class="kpi-value">{player_batting['SR'].values[0]:.2f}</div></div>""", unsafe_allow_html=True)
-            with col4:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">High Score</div><div class="kpi-value">{player_batting['HS'].values[0]}</div></div>""", unsafe_allow_html=True)
-        else:
-            st.markdown("#### Batting\n*No batting stats available for this player.*")
-
-        # --- Bowling Stats ---
-        if not player_bowling.empty and player_bowling['Balls'].values[0] > 0:
-            st.markdown("#### Bowling")
-            col1, col2, col3, col4 = st.columns(4)
-            with col1:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Wickets</div><div class="kpi-value">{player_bowling['Wkts'].values[0]}</div></div>""", unsafe_allow_html=True)
-            with col2:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Bowling Avg</div><div class="kpi-value">{player_bowling['Ave'].values[0]:.2f}</div></div>""", unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Economy</div><div class="kpi-value">{player_bowling['Econ'].values[0]:.2f}</div></div>""", unsafe_allow_html=True)
-            with col4:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Best Bowling</div><div class="kpi-value">{player_bowling['BBI'].values[0]}</div></div>""", unsafe_allow_html=True)
-        else:
-            st.markdown("#### Bowling\n*No bowling stats available for this player.*")
-        
-        # --- Fielding Stats ---
-        if not player_fielding.empty:
-            st.markdown("#### Fielding")
-            col1, _, _ = st.columns(3) # Just show catches
-            with col1:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Catches</div><div class="kpi-value">{player_fielding['Ct'].values[0]}</div></div>""", unsafe_allow_html=True)
-        else:
-            st.markdown("#### Fielding\n*No fielding stats available for this player.*")
-
-        # --- WICKET-KEEPING STATS TO PLAYER PAGE ---
-        if not player_wk.empty:
-            st.markdown("#### Wicket-Keeping")
-            col1, col2, col3 = st.columns(3)
-            with col1:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Dismissals</div><div class="kpi-value">{player_wk['Dis'].values[0]}</div></div>""", unsafe_allow_html=True)
-            with col2:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Catches (WK)</div><div class="kpi-value">{player_wk['Ct'].values[0]}</div></div>""", unsafe_allow_html=True)
-            with col3:
-                st.markdown(f"""<div class="kpi-card"><div class="kpi-title">Stumpings</div><div class="kpi-value">{player_wk['St'].values[0]}</div></div>""", unsafe_allow_html=True)
+        # --- Batting, Bowling, Fielding and Wicket-Keeping cards (players.KPI_CARDS) ---
+        for table, heading in players.KPI_SECTIONS.items():
+            cards = players.kpi_cards(profile, table)
+            if cards:
+                st.markdown(f"#### {heading}")
+                show_kpi_cards(cards, min_columns=3)
+            elif table != 'wk':
+                st.markdown(f"#### {heading}\n*No {heading.lower()} stats available for this player.*")
+
+        # --- Derived Metrics (computed in derived.py at load time) ---
+        impact = load_impact(tournament, version_of(*players.PlayerIndex.TABLES)) if tournament is not None else None
+        derived_kpis = players.derived_cards(
+            profile, impact.get(selected_player) if impact is not None else None)
+        if derived_kpis:
+            st.markdown("#### Derived Metrics")
+            show_kpi_cards(derived_kpis)
         
 
     elif analysis_mode == "Multi-Player Comparison":
+        telemetry.section("comparison")
         st.subheader("Compare Player Stats")
 
         # --- Multi-Player Selection ---
-        default_players = []
-        if "Virat Kohli" in all_players:
-            default_players.append("Virat Kohli")
-        if "Rohit Sharma" in all_players:
-            default_players.append("Rohit Sharma")
+        default_players = player_index.present(["Virat Kohli", "Rohit Sharma"])
 
         selected_players = st.multiselect(
             "Select players to compare",
@@ -530,74 +628,103 @@ elif page == "👤 Player Analysis":
             default=default_players
         )
 
-        if selected_players:
-            bat_compare_df = batting_stats[batting_stats['Player'].isin(selected_players)]
-            bowl_compare_df = bowling_stats[bowling_stats['Player'].isin(selected_players)]
-
+        if selected_players and tournament is not None:
+            with telemetry.phase('load'):
+                engine = load_comparison(tournament, version_of(*players.PlayerIndex.TABLES))
+            compare_df = engine.panels(selected_players)
+
+            # All metrics for all selected players in one small-multiples figure
+            st.markdown("#### Batting & Bowling Comparison")
+            if not (compare_df['Group'] == 'Batting').any():
+                st.warning("No batting data for selected players.")
+            # Only players who actually bowled (Balls > 0) have bowling figures
+            if not (compare_df['Group'] == 'Bowling').any():
+                st.warning("No bowling data for selected players.")
+            if not compare_df.empty:
+                show_chart(page, 'compare_grid', compare_df, ['batting', 'bowling'],
+                           panels=comparison.CHART_PANELS)
+
+            # --- Nearest neighbours on the normalised metrics ---
+            telemetry.section("similar players")
+            st.markdown("#### Most Similar Players")
+            anchor = st.selectbox("Find players similar to", selected_players)
             col1, col2 = st.columns(2)
-
             with col1:
-                st.markdown("#### Batting Comparison")
-                
-                if not bat_compare_df.empty:
-                    # Runs
-                    fig_runs, ax = plt.subplots()
-                    sns.barplot(data=bat_compare_df, x='Player', y='Runs', palette="Blues", ax=ax)
-                    ax.set_title("Total Runs")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_runs)
-                    
-                    # Batting Avg
-                    fig_avg, ax = plt.subplots()
-                    sns.barplot(data=bat_compare_df, x='Player', y='Ave', palette="Greens", ax=ax)
-                    ax.set_title("Batting Average")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_avg)
-
-                    # Strike Rate
-                    fig_sr, ax = plt.subplots()
-                    sns.barplot(data=bat_compare_df, x='Player', y='SR', palette="Oranges", ax=ax) 
-                    ax.set_title("Strike Rate")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_sr)
+                st.markdown("**Batting** (Runs, Ave, SR, HS)")
+                if anchor in engine.batting:
+                    st.dataframe(engine.batting.similar(anchor), use_container_width=True, hide_index=True)
                 else:
-                    st.warning("No batting data for selected players.")
-
+                    st.markdown("*No batting stats available for this player.*")
             with col2:
-                st.markdown("#### Bowling Comparison")
-
-                # Filter for players who actually bowled (Wkts > 0 or Balls > 0)
-                bowl_compare_df = bowl_compare_df[bowl_compare_df['Balls'] > 0]
-
-                if not bowl_compare_df.empty:
-                    # Wickets
-                    fig_wkts, ax = plt.subplots()
-                    sns.barplot(data=bowl_compare_df, x='Player', y='Wkts', palette="Reds", ax=ax)
-                    ax.set_title("Total Wickets")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_wkts)
-                    
-                    # Economy
-                    fig_econ, ax = plt.subplots()
-                    sns.barplot(data=bowl_compare_df, x='Player', y='Econ', palette="Purples", ax=ax)
-                    ax.set_title("Economy Rate")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_econ)
-
-                    # Bowling Avg
-                    fig_bavg, ax = plt.subplots()
-                    sns.barplot(data=bowl_compare_df, x='Player', y='Ave', palette="bone", ax=ax)
-                    ax.set_title("Bowling Average")
-                    plt.xticks(rotation=45, ha='right')
-                    plt.tight_layout()
-                    st.pyplot(fig_bavg)
+                st.markdown("**Bowling** (Wkts, Econ, Ave, SR)")
+                if anchor in engine.bowling:
+                    st.dataframe(engine.bowling.similar(anchor), use_container_width=True, hide_index=True)
                 else:
-                    st.warning("No bowling data for selected players.")
-
-elif batting_stats.empty or bowling_stats.empty or fielding_stats.empty or wk_stats.empty: 
-    st.error("Dataframes are empty. Failed to load or clean CSV files.")
\ No newline at end of file
+                    st.markdown("*No bowling stats available for this player.*")
+
+#  9. PAGE: TOURNAMENT SIMULATOR
+elif page == "🎲 Tournament Simulator" and not match_results.empty:
+    st.title("Tournament Simulator")
+    st.markdown("Team ratings fitted to this tournament's results, and the odds of each team "
+                "going deep when the whole tournament is replayed many times.")
+
+    telemetry.section("simulation")
+    n_simulations = st.select_slider("Simulated tournaments",
+                                     options=[100_000, 250_000, 500_000, 1_000_000],
+                                     format_func=lambda n: f"{n:,}")
+    with st.spinner("Simulating…"):
+        ratings, odds = load_simulation(tournament, version_of('matches'), n_simulations)
+    if odds is None:
+        st.info(f"Only {len(ratings)} team(s) played in this tournament; at least "
+                f"{simulation.MIN_TEAMS} are needed to simulate it.")
+        st.dataframe(ratings.drop(columns='Strength'), use_container_width=True, hide_index=True)
+    else:
+        if tournament not in simulation.FORMATS:
+            st.caption("The real group draw is not known for this tournament, "
+                       "so teams are drawn into groups by rating.")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Title Odds (Top 10)")
+            show_chart(page, 'bar', odds.head(10), ['matches'],
+                       x='Title', y='Team', palette='viridis',
+                       title="Title Probability (%)", xlabel="Title %", ylabel="Team")
+        with col2:
+            st.subheader("Team Ratings")
+            st.dataframe(ratings.drop(columns='Strength'), use_container_width=True, hide_index=True)
+
+        telemetry.section("stage odds")
+        st.subheader("Chance of Reaching Each Stage (%)")
+        st.dataframe(odds, use_container_width=True, hide_index=True)
+
+elif any(df.empty for df in page_tables.values()):
+    st.error("Dataframes are empty. Failed to load or clean CSV files.")
+
+telemetry.section("charts")
+finish_charts()
+run_profile = telemetry.finish_run(page)
+
+#  10. DEBUG PANEL
+# Figure and memory counters, to confirm memory stays flat across reruns.
+st.session_state['rerun_count'] = st.session_state.get('rerun_count', 0) + 1
+with st.sidebar.expander("Debug"):
+    rss = telemetry.process_rss_bytes()
+    cache_stats = charts.figure_cache.stats()
+    memory = data_store.memory_report()
+    st.markdown(f"Reruns (this session): **{st.session_state['rerun_count']}**")
+    st.markdown(f"Live figures: **{charts.live_figure_count()}**")
+    st.markdown(f"Figures opened / closed: **{charts.figures_opened} / {charts.figures_closed}**")
+    st.markdown(f"Process RSS: **{rss / 2**20:.1f} MB**" if rss is not None else "Process RSS: **n/a**")
+    st.markdown(f"Figure cache: **{cache_stats['entries']}** entries, "
+                f"**{cache_stats['bytes'] / 2**20:.1f} MB**, "
+                f"{cache_stats['hits']} hits / {cache_stats['misses']} misses, "
+                f"{cache_stats['evictions']} evicted by data changes")
+    dictionaries = schema.categories.nbytes()
+    st.markdown(f"Loaded tables: **{(memory['Compact Bytes'].sum() + dictionaries) / 2**20:.2f} MB**, "
+                f"saving {(memory['Saved Bytes'].sum() - dictionaries) / 2**20:.2f} MB")
+    if run_profile is not None:
+        # p50/p95 over the recent reruns of this page, across all sessions.
+        st.markdown(f"Last rerun: **{run_profile['total_ms']:.0f} ms**")
+        profile_rows = telemetry.summarize(telemetry.run_metrics.records(page))
+        st.dataframe(pd.DataFrame(profile_rows).drop(columns='Page'),
+                     use_container_width=True, hide_index=True)
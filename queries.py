@@ -0,0 +1,154 @@
+"""Team, ground and head-to-head rollups over the loaded tables.
+
+``StatsQueries`` reads one tournament's cleaned tables through a
+``get_table(name)`` callable, so a query only loads the tables it needs,
+and memoises every result on the query name and its parameters. Build one
+per data version, or give it a ``table_version(name)`` callable and keep
+one per tournament: each result then remembers the versions of the tables
+it read and is recomputed only once one of those changes, so new batting
+figures leave the match-only rollups cached. The Streamlit pages keep it
+in ``st.cache_resource`` and other services can use ``from_store``.
+
+Tied and no-result matches are dropped at load time, so "played" counts
+decided matches only.
+"""
+import threading
+
+import pandas as pd
+
+
+class StatsQueries:
+    """Memoised aggregate queries over one tournament's tables."""
+
+    def __init__(self, get_table, version=None, table_version=None):
+        self.get_table = get_table
+        self.version = version
+        self.table_version = table_version
+        self._memo = {}     # key -> (versions of the tables read, result)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_store(cls, store, tournament):
+        return cls(lambda table: store.table(tournament, table), store.version(tournament),
+                   lambda table: store.table_version(tournament, table))
+
+    def _cached(self, key, tables, compute):
+        # Versions are read before the tables, so a result computed from
+        # newer data than its versions say is only ever recomputed again.
+        versions = (tuple(self.table_version(table) for table in tables)
+                    if self.table_version is not None else None)
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is not None and entry[0] == versions:
+                return entry[1]
+        result = compute()
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is None or entry[0] != versions:
+                entry = self._memo[key] = (versions, result)   # replaces a stale result
+            return entry[1]
+
+    # Results are shared between callers, so DataFrames are handed out as copies.
+    def _frame(self, key, tables, compute):
+        return self._cached(key, tables, compute).copy()
+
+    #  TEAMS
+    def top_winners(self, n=10):
+        """Teams with the most wins, as a Team/Wins frame."""
+        def compute():
+            matches = self.get_table('matches')
+            if 'Winner' not in matches.columns:   # no results file
+                return pd.DataFrame({'Team': pd.Series(dtype=str), 'Wins': pd.Series(dtype=int)})
+            wins = matches['Winner'].value_counts()
+            # Shared team dictionaries also list teams without a win.
+            wins = wins[wins > 0].nlargest(n).reset_index()
+            wins.columns = ['Team', 'Wins']
+            wins['Team'] = wins['Team'].astype(str)
+            return wins
+        return self._frame(('top_winners', n), ('matches',), compute)
+
+    def team_records(self):
+        """Played, Wins, Losses and Win % per team, most wins first."""
+        def compute():
+            matches = self.get_table('matches')
+            if 'Winner' not in matches.columns:
+                return pd.DataFrame(columns=['Team', 'Played', 'Wins', 'Losses', 'Win %'])
+            played = pd.concat([matches['Team 1'], matches['Team 2']]).value_counts()
+            played = played[played > 0]
+            played.index = played.index.astype(str)
+            wins = matches['Winner'].value_counts().reindex(played.index, fill_value=0)
+            records = pd.DataFrame({'Played': played, 'Wins': wins})
+            records['Losses'] = records['Played'] - records['Wins']
+            records['Win %'] = (100 * records['Wins'] / records['Played']).round(2)
+            records.index.name = 'Team'
+            return (records.reset_index()
+                    .sort_values(['Wins', 'Win %', 'Team'], ascending=[False, False, True])
+                    .reset_index(drop=True))
+        return self._frame(('team_records',), ('matches',), compute)
+
+    def team_totals(self):
+        """Total runs scored and wickets taken per team."""
+        def compute():
+            batting, bowling = self.get_table('batting'), self.get_table('bowling')
+            runs = batting.groupby('Team')['Runs'].sum() if not batting.empty else pd.Series(dtype=float)
+            wkts = bowling.groupby('Team')['Wkts'].sum() if not bowling.empty else pd.Series(dtype=float)
+            totals = pd.DataFrame({'Runs': runs, 'Wkts': wkts}).fillna(0)
+            totals.index.name = 'Team'
+            return totals.reset_index().sort_values('Runs', ascending=False).reset_index(drop=True)
+        return self._frame(('team_totals',), ('batting', 'bowling'), compute)
+
+    def head_to_head(self, team_a, team_b):
+        """Record between two teams: played, wins for each side and the matches."""
+        def compute():
+            matches = self.get_table('matches')
+            columns = ['Match Date', 'Team 1', 'Team 2', 'Winner', 'Margin', 'Ground']
+            if 'Team 1' not in matches.columns:
+                return {'played': 0, 'wins': {team_a: 0, team_b: 0},
+                        'matches': pd.DataFrame(columns=columns)}
+            pair = {team_a, team_b}
+            mask = (matches['Team 1'].isin(pair) & matches['Team 2'].isin(pair)
+                    & (matches['Team 1'] != matches['Team 2']))
+            games = matches.loc[mask, columns].reset_index(drop=True)
+            return {
+                'played': len(games),
+                'wins': {team: int((games['Winner'] == team).sum()) for team in (team_a, team_b)},
+                'matches': games,
+            }
+        result = self._cached(('head_to_head',) + tuple(sorted((team_a, team_b))), ('matches',),
+                              compute)
+        return {'played': result['played'], 'wins': dict(result['wins']),
+                'matches': result['matches'].copy()}
+
+    #  GROUNDS
+    def ground_results(self):
+        """Matches per ground, split by whether the side batting first won."""
+        def compute():
+            matches = self.get_table('matches')
+            if 'Ground' not in matches.columns:
+                return pd.DataFrame(columns=['Ground', 'Matches', 'Won Batting First',
+                                             'Won Chasing', 'Run Margin', 'Wicket Margin'])
+            by_runs = matches['margin_kind'] == 'runs'
+            by_wickets = matches['margin_kind'] == 'wickets'
+            grounds = pd.DataFrame({
+                'Ground': matches['Ground'],
+                'Matches': 1,
+                'Won Batting First': by_runs.astype(int),
+                'Won Chasing': by_wickets.astype(int),
+                'Run Margin': matches['margin_value'].where(by_runs),
+                'Wicket Margin': matches['margin_value'].where(by_wickets),
+            })
+            result = grounds.groupby('Ground').agg({
+                'Matches': 'sum',
+                'Won Batting First': 'sum',
+                'Won Chasing': 'sum',
+                'Run Margin': 'mean',
+                'Wicket Margin': 'mean',
+            })
+            result[['Run Margin', 'Wicket Margin']] = (
+                result[['Run Margin', 'Wicket Margin']].astype(float).round(2))
+            return (result.reset_index()
+                    # Grounds are categorical; break ties on the name, not the code.
+                    .sort_values(['Matches', 'Ground'], ascending=[False, True],
+                                 key=lambda col: col.astype(str) if col.name == 'Ground' else col)
+                    .reset_index(drop=True))
+        return self._frame(('ground_results',), ('matches',), compute)
@@ -0,0 +1,185 @@
+"""Declared dtypes for every stat table, and the memory they save.
+
+Each table maps its columns to one of:
+
+- a category domain (``'player'``, ``'team'``, ...): the column becomes a
+  categorical whose dictionary is shared by every column and table in that
+  domain, so "India" is stored once however many frames mention it;
+- ``COUNT``: the smallest integer type that holds the values (nullable if
+  any are missing);
+- ``RATE``: float32.
+
+Columns a table does not declare are left as parsed. Shared dictionaries
+only ever grow, so codes stay comparable between frames loaded at
+different times; a frame may list categories it does not use, which is
+why chart code turns categoricals back into plain strings (``plain``).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+COUNT = 'count'
+RATE = 'rate'
+
+TABLE_SCHEMAS = {
+    'batting': {
+        'Player': 'player', 'Team': 'team',
+        'Mat': COUNT, 'Inns': COUNT, 'NO': COUNT, 'Runs': COUNT, 'HS': COUNT,
+        '100': COUNT, '50': COUNT, '0': COUNT,
+        'Ave': RATE, 'SR': RATE, 'Runs/Inn': RATE, 'BF': RATE, 'Balls/Out': RATE,
+        'Out/Inn': RATE,
+    },
+    'bowling': {
+        'Player': 'player', 'Team': 'team',
+        'Mat': COUNT, 'Inns': COUNT, 'Balls': COUNT, 'Mdns': COUNT, 'Runs': COUNT,
+        'Wkts': COUNT, '5': COUNT, '10': COUNT, 'Ct': COUNT,
+        'bbi_wkts': COUNT, 'bbi_runs': COUNT,
+        'Ave': RATE, 'Econ': RATE, 'SR': RATE, 'Balls/Wkt': RATE, 'Wkts/Mat': RATE,
+        'Adj Econ': RATE,
+    },
+    'fielding': {
+        'Player': 'player', 'Team': 'team',
+        'Mat': COUNT, 'Inns': COUNT, 'Ct': COUNT, 'Max': COUNT,
+        'Ct/Inn': RATE, 'Ct/Mat': RATE,
+    },
+    'wk': {
+        'Player': 'player', 'Team': 'team',
+        'Mat': COUNT, 'Inns': COUNT, 'Dis': COUNT, 'Ct': COUNT, 'St': COUNT,
+        'Max Dis Inns': COUNT,
+        'Dis/Inn': RATE, 'Dis/Mat': RATE,
+    },
+    'matches': {
+        'Team 1': 'team', 'Team 2': 'team', 'Winner': 'team', 'Ground': 'ground',
+        'margin_value': COUNT, 'margin_kind': 'margin_kind',
+    },
+}
+
+# Added to every table by the loader.
+COMMON_SCHEMA = {'Tournament': 'tournament'}
+
+
+class CategoryRegistry:
+    """Append-only dictionaries of category values, one per domain."""
+
+    def __init__(self):
+        self._dtypes = {}
+        self._lock = threading.Lock()
+
+    def dtype(self, domain, values):
+        """The domain's CategoricalDtype, extended with any new ``values``."""
+        with self._lock:
+            current = self._dtypes.get(domain)
+            known = current.categories if current is not None else pd.Index([], dtype=str)
+            new = pd.Index(values.dropna().unique()).difference(known)
+            if current is None or len(new):
+                current = pd.CategoricalDtype(known.append(new.astype(known.dtype)))
+                self._dtypes[domain] = current
+            return current
+
+    def nbytes(self):
+        """Memory held by the dictionaries themselves."""
+        with self._lock:
+            return int(sum(dtype.categories.memory_usage(deep=True)
+                           for dtype in self._dtypes.values()))
+
+    def clear(self):
+        with self._lock:
+            self._dtypes.clear()
+
+
+# One registry per process, shared by every store and session.
+categories = CategoryRegistry()
+
+
+def _count(col):
+    values = pd.to_numeric(col, errors='coerce')
+    # Nullable only when something is actually missing.
+    values = values.astype('Int64' if values.isna().any() else 'int64')
+    return pd.to_numeric(values, downcast='integer')
+
+
+def _values(col):
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.astype(col.cat.categories.dtype)
+    return col
+
+
+def apply(table, df, registry=categories):
+    """Convert ``df``'s columns in place to the dtypes declared for ``table``."""
+    schema = {**TABLE_SCHEMAS.get(table, {}), **COMMON_SCHEMA}
+    domains = {}
+    for col, kind in schema.items():
+        if col not in df.columns:
+            continue
+        if kind == COUNT:
+            df[col] = _count(df[col])
+        elif kind == RATE:
+            df[col] = pd.to_numeric(df[col], errors='coerce').astype(np.float32)
+        else:
+            domains.setdefault(kind, []).append(col)
+
+    # Extend each domain with every column's values before casting any, so
+    # columns of one domain ("Team 1", "Team 2", "Winner") share one dtype
+    # and compare with each other.
+    for kind, cols in domains.items():
+        values = {col: _values(df[col]) for col in cols}
+        dtype = registry.dtype(kind, pd.concat(values.values(), ignore_index=True))
+        for col in cols:
+            df[col] = values[col].astype(dtype)
+    return df
+
+
+def attach(table, df, registry=categories):
+    """Re-point ``df``'s categoricals, in place, at the registry's shared dtypes.
+
+    For frames read back from a snapshot, whose categoricals carry their
+    own copy of the dictionary. Where the registry lists that dictionary
+    first (always, for the first frame loaded of a domain) the codes are
+    kept as they are, still mapped; otherwise they are translated.
+    """
+    schema = {**TABLE_SCHEMAS.get(table, {}), **COMMON_SCHEMA}
+    domains = {}
+    for col, kind in schema.items():
+        if (col in df.columns and kind not in (COUNT, RATE)
+                and isinstance(df[col].dtype, pd.CategoricalDtype)):
+            domains.setdefault(kind, []).append(col)
+
+    for kind, cols in domains.items():
+        own = [df[col].cat.categories for col in cols]
+        dtype = registry.dtype(kind, pd.Series(own[0].append(own[1:]).unique()))
+        for col, cats in zip(cols, own):
+            codes = df[col].cat.codes.to_numpy()
+            if not dtype.categories[:len(cats)].equals(cats):
+                mapping = dtype.categories.get_indexer(cats)
+                codes = np.where(codes >= 0, mapping[codes], -1)
+            df[col] = pd.Categorical.from_codes(codes, dtype=dtype)
+    return df
+
+
+def frame_bytes(df):
+    """Deep memory use of a frame, counting only the codes of categoricals.
+
+    Shared dictionaries belong to the registry (``categories.nbytes()``),
+    not to any one frame.
+    """
+    total = df.index.memory_usage(deep=True)
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            total += values.cat.codes.memory_usage(index=False)
+        else:
+            total += values.memory_usage(index=False, deep=True)
+    return int(total)
+
+
+def plain(df):
+    """``df`` with categoricals turned back into their values' dtype."""
+    categorical = [col for col in df.columns if isinstance(df[col].dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return df
+    df = df.copy()
+    for col in categorical:
+        df[col] = df[col].astype(df[col].cat.categories.dtype)
+    return df
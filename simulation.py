@@ -0,0 +1,260 @@
+"""Team strength ratings and Monte Carlo simulation of a tournament.
+
+``fit_ratings`` fits a Bradley-Terry model to the decided matches: team
+``i`` beats team ``j`` with probability ``s_i / (s_i + s_j)``. Every team
+also gets one virtual win and one virtual loss against an average side,
+so an unbeaten team still has a finite strength. Ratings are reported on
+an Elo-like scale (1500 is average, +400 is ten-to-one odds).
+
+``simulate`` plays the whole tournament ``n`` times at once. Every round
+robin is one vectorised draw over all its fixtures and all simulations,
+with each knockout round one more, so there is no Python loop per match or
+per simulation. A tie on points is broken at random, standing in for net
+run rate. Large runs are split into chunks with independent random
+streams, played across worker processes where there is more than one core.
+
+Formats: ``FORMATS`` has the real group draw and Super 8 seeding of the
+editions we know; any other tournament is drawn into groups by rating.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+import charts
+
+
+# Simulations per chunk, which bounds the memory one draw needs.
+CHUNK_SIZE = 50_000
+
+# Runs at least this large are spread across worker processes.
+PARALLEL_MIN_SIMULATIONS = 200_000
+
+STAGES = ['Qualify', 'Semi-final', 'Final', 'Title']
+
+# Fewer teams than this is a series, not a tournament, and is not simulated.
+MIN_TEAMS = 3
+
+
+class TournamentFormat:
+    """Groups, then optionally a second group stage, then semi-finals and a final.
+
+    ``groups`` lists the teams of each first-round group; the top two of
+    each go through. ``seeds`` gives each group's pre-assigned (first,
+    second) seeds, which keep their slot if they qualify, whatever their
+    finishing position; None seeds by finishing position. ``super_groups``
+    lists the (group, slot) qualifiers of each second-round group, slot 0
+    or 1. Without it, the first-round qualifiers go straight to knockouts.
+    """
+
+    def __init__(self, groups, seeds=None, super_groups=None):
+        if any(len(group) < 2 for group in groups):
+            raise ValueError("Every group needs at least two teams")
+        self.groups = groups
+        self.seeds = seeds
+        self.super_groups = super_groups
+
+
+T20_WORLD_CUP_2024 = TournamentFormat(
+    groups=[
+        ['India', 'Pakistan', 'Ireland', 'Canada', 'United States of America'],
+        ['England', 'Australia', 'Namibia', 'Scotland', 'Oman'],
+        ['New Zealand', 'West Indies', 'Afghanistan', 'Uganda', 'Papua New Guinea'],
+        ['South Africa', 'Sri Lanka', 'Bangladesh', 'Netherlands', 'Nepal'],
+    ],
+    seeds=[('India', 'Pakistan'), ('England', 'Australia'),
+           ('New Zealand', 'West Indies'), ('South Africa', 'Sri Lanka')],
+    super_groups=[[(0, 0), (1, 1), (2, 0), (3, 1)],
+                  [(0, 1), (1, 0), (2, 1), (3, 0)]],
+)
+
+FORMATS = {
+    'icc_mens_t20_world_cup_2024': T20_WORLD_CUP_2024,
+}
+
+
+#  RATINGS
+def fit_ratings(matches, iterations=500, tol=1e-9):
+    """Bradley-Terry strength per team, as a Team/Rating/Played/Won frame."""
+    teams = sorted(set(matches['Team 1'].dropna().astype(str))
+                   | set(matches['Team 2'].dropna().astype(str)))
+    if not teams:
+        return pd.DataFrame(columns=['Team', 'Rating', 'Played', 'Won', 'Strength'])
+    index = {team: i for i, team in enumerate(teams)}
+    decided = matches.dropna(subset=['Team 1', 'Team 2', 'Winner'])
+    first = decided['Team 1'].astype(str).map(index).to_numpy()
+    second = decided['Team 2'].astype(str).map(index).to_numpy()
+    winner = decided['Winner'].astype(str).map(index).to_numpy()
+    loser = np.where(winner == first, second, first)
+
+    n = len(teams)
+    wins = np.zeros((n, n))
+    np.add.at(wins, (winner, loser), 1)
+    games = wins + wins.T
+    won = wins.sum(axis=1)
+
+    # Minorisation-maximisation, with one win and one loss against a team of strength 1.
+    strength = np.ones(n)
+    for _ in range(iterations):
+        pair = games / (strength[:, None] + strength[None, :])
+        updated = (won + 1) / (pair.sum(axis=1) + 2 / (strength + 1))
+        updated /= np.exp(np.log(updated).mean())
+        converged = np.abs(updated - strength).max() < tol
+        strength = updated
+        if converged:
+            break
+
+    ratings = pd.DataFrame({
+        'Team': teams,
+        'Rating': np.round(1500 + 400 * np.log10(strength)).astype(int),
+        'Played': games.sum(axis=1).astype(int),
+        'Won': won.astype(int),
+        'Strength': strength,
+    })
+    return ratings.sort_values('Rating', ascending=False, ignore_index=True)
+
+
+def win_probabilities(strength):
+    """Matrix of P(row team beats column team)."""
+    strength = np.asarray(strength, dtype=float)
+    return strength[:, None] / (strength[:, None] + strength[None, :])
+
+
+def default_format(teams):
+    """Groups of four or more drawn by rating (snake order), top two through.
+
+    Fewer than eight teams play one group, whose top two meet in the final.
+    """
+    n_groups = 1 if len(teams) < 8 else 2 if len(teams) < 16 else 4
+    groups = [[] for _ in range(n_groups)]
+    for i, team in enumerate(teams):
+        lap, pos = divmod(i, n_groups)
+        groups[pos if lap % 2 == 0 else n_groups - 1 - pos].append(team)
+    return TournamentFormat(groups)
+
+
+#  SIMULATION
+def _round_robin(teams, win_prob, rng):
+    """Finishing order of one round robin per row of ``teams`` (n_sims x k)."""
+    k = teams.shape[1]
+    home, away = np.triu_indices(k, 1)
+    home_wins = rng.random((len(teams), len(home))) < win_prob[teams[:, home], teams[:, away]]
+    # Points per position: a fixtures-by-positions incidence product, not a loop.
+    points = (home_wins @ np.eye(k)[home]) + (~home_wins @ np.eye(k)[away])
+    points += rng.random(points.shape)   # random tie-break within the same points
+    order = np.argsort(-points, axis=1, kind='stable')
+    return np.take_along_axis(teams, order, axis=1)
+
+
+def _knockout(first, second, win_prob, rng):
+    return np.where(rng.random(first.shape) < win_prob[first, second], first, second)
+
+
+def _qualifiers(standings, seeds):
+    """(slot 0, slot 1) qualifiers of one group, honouring pre-assigned seeds."""
+    top, runner_up = standings[:, 0], standings[:, 1]
+    if seeds is None:
+        return top, runner_up
+    seed0, seed1 = seeds
+    has0 = (top == seed0) | (runner_up == seed0)
+    has1 = (top == seed1) | (runner_up == seed1)
+    # A seed that qualifies keeps its slot; the other qualifier takes the free one.
+    slot0 = np.where(has0, seed0, np.where(has1, top + runner_up - seed1, top))
+    slot1 = np.where(has1, seed1, np.where(has0, top + runner_up - seed0, runner_up))
+    return slot0, slot1
+
+
+def _simulate_chunk(plan, win_prob, n, seed):
+    """Stage counts per team (len(STAGES) x n_teams) over ``n`` simulations."""
+    rng = np.random.default_rng(seed)
+    n_teams = len(win_prob)
+    counts = np.zeros((len(STAGES), n_teams), dtype=np.int64)
+
+    slots = []
+    for group, seeds in zip(plan['groups'], plan['seeds']):
+        standings = _round_robin(np.broadcast_to(group, (n, len(group))), win_prob, rng)
+        slots.append(_qualifiers(standings, seeds))
+    qualified = np.stack([team for pair in slots for team in pair], axis=1)
+    counts[0] = np.bincount(qualified.ravel(), minlength=n_teams)
+
+    if plan['super_groups'] is not None:
+        finishers = []
+        for members in plan['super_groups']:
+            teams = np.stack([slots[g][slot] for g, slot in members], axis=1)
+            finishers.append(_round_robin(teams, win_prob, rng)[:, :2])
+    else:
+        finishers = [np.stack(pair, axis=1) for pair in slots]
+
+    # Each group winner meets the runner-up of the group half the draw away
+    # (1A v 2B, 1B v 2A; with four groups 1A v 2C ...), so two group
+    # winners can only meet after the first knockout round.
+    half = len(finishers) // 2
+    bracket = np.stack([team for g, top in enumerate(finishers)
+                        for team in (top[:, 0], finishers[(g + half) % len(finishers)][:, 1])],
+                       axis=1)
+    # A bracket that starts at the final (one group) skips the semi-finals;
+    # its finalists count as having got that far.
+    for stage in range(1, {4: 1, 2: 2}.get(bracket.shape[1], 1)):
+        counts[stage] += np.bincount(bracket.ravel(), minlength=n_teams)
+    while bracket.shape[1] > 1:
+        stage = {4: 1, 2: 2}.get(bracket.shape[1])
+        if stage is not None:
+            counts[stage] += np.bincount(bracket.ravel(), minlength=n_teams)
+        bracket = _knockout(bracket[:, 0::2], bracket[:, 1::2], win_prob, rng)
+    counts[3] += np.bincount(bracket.ravel(), minlength=n_teams)
+    return counts
+
+
+def _plan(fmt, index):
+    """The format as team indices, in a form worker processes can unpickle."""
+    return {
+        'groups': [np.array([index[team] for team in group]) for group in fmt.groups],
+        'seeds': ([tuple(index[team] for team in pair) for pair in fmt.seeds]
+                  if fmt.seeds else [None] * len(fmt.groups)),
+        'super_groups': fmt.super_groups,
+    }
+
+
+def simulate(ratings, fmt=None, n=100_000, seed=0, workers=None):
+    """Probability of reaching each stage per team, best title odds first.
+
+    ``ratings`` is ``fit_ratings`` output. Teams the format lists but the
+    ratings lack play at average strength.
+    """
+    if len(ratings) < MIN_TEAMS:
+        raise ValueError(f"Need at least {MIN_TEAMS} rated teams to simulate, got {len(ratings)}")
+    if fmt is None:
+        fmt = default_format(ratings['Team'].tolist())
+    teams = list(ratings['Team'])
+    teams += [t for group in fmt.groups for t in group if t not in teams]
+    index = {team: i for i, team in enumerate(teams)}
+    strength = ratings.set_index('Team')['Strength'].reindex(teams).fillna(1.0).to_numpy()
+    win_prob = win_probabilities(strength)
+    plan = _plan(fmt, index)
+
+    sizes = [CHUNK_SIZE] * (n // CHUNK_SIZE) + ([n % CHUNK_SIZE] if n % CHUNK_SIZE else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(plan, win_prob, size, s) for size, s in zip(sizes, seeds)]
+    if workers is None:
+        workers = min(len(jobs), (os.cpu_count() or 1)) if n >= PARALLEL_MIN_SIMULATIONS else 1
+    if workers > 1:
+        with charts.spawn_pool(workers) as pool:
+            results = pool.starmap(_simulate_chunk, jobs)
+    else:
+        results = [_simulate_chunk(*job) for job in jobs]
+    counts = np.sum(results, axis=0)
+
+    in_format = sorted({index[t] for group in fmt.groups for t in group})
+    odds = pd.DataFrame(100.0 * counts[:, in_format].T / n, columns=STAGES).round(2)
+    odds.insert(0, 'Team', [teams[i] for i in in_format])
+    odds.insert(1, 'Rating', ratings.set_index('Team')['Rating']
+                .reindex(odds['Team']).fillna(1500).astype(int).to_numpy())
+    return odds.sort_values(['Title', 'Final', 'Semi-final', 'Qualify'],
+                            ascending=False, ignore_index=True)
+
+
+def tournament_format(tournament, ratings):
+    """The known format of ``tournament``, else groups drawn from ``ratings``."""
+    if tournament in FORMATS:
+        return FORMATS[tournament]
+    return default_format(ratings['Team'].tolist())
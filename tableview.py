@@ -0,0 +1,121 @@
+"""Server-side sorted, filtered and paginated views of the full stat tables.
+
+A ``TableView`` keeps its table on the server and hands the page only the
+rows it shows. Each column is argsorted once, the first time it is sorted
+on, and the view is built once per data version, so a sort is a lookup of
+a precomputed order. Filtering by team or searching by player/team name
+is a vectorised mask over that order, and only one page of rows is
+materialised. The rows sent to the browser, and so the payload, stay the
+same size however large the table grows.
+
+Missing values sort last in either direction. Equal values keep table
+order (the sorts are stable).
+"""
+import threading
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+
+PAGE_SIZE = 25
+
+# Column each full table is sorted on (descending) when first shown.
+DEFAULT_SORT = {
+    'batting': 'Runs',
+    'bowling': 'Wkts',
+    'fielding': 'Ct',
+    'wk': 'Dis',
+}
+
+
+def _sort_key(values):
+    """Float keys that order like ``values``, NaN where missing."""
+    if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Shared dictionaries list values in the order they were first seen,
+        # so rank the categories alphabetically and key each row on its rank.
+        categories = values.cat.categories.astype(str).to_numpy()
+        ranks = np.empty(len(categories))
+        ranks[np.argsort(categories, kind='stable')] = np.arange(len(categories))
+        codes = values.cat.codes.to_numpy()
+        return np.where(codes >= 0, ranks[codes] if len(ranks) else 0.0, np.nan)
+    if values.dtype == object:
+        # Mixed objects sort on their text, missing values staying missing.
+        values = values.where(values.isna(), values.astype(str))
+    # Strings and dates sort on their sorted factor codes.
+    codes, _ = pd.factorize(values, sort=True)
+    key = codes.astype(float)
+    key[codes < 0] = np.nan
+    return key
+
+
+def _name_matcher(values):
+    """(codes, lower-cased distinct names) of a name column, for substring search."""
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques).astype(str).str.lower()
+
+
+class TableView:
+    """One table with cached sort orders, filtered and sliced a page at a time."""
+
+    def __init__(self, df, default_sort=None):
+        self.df = df
+        self.columns = [str(col) for col in df.columns]
+        self.default_sort = default_sort if default_sort in self.columns else self.columns[0]
+        self.teams = (sorted(df['Team'].dropna().astype(str).unique())
+                      if 'Team' in df.columns else [])
+        self._orders = {}     # (column, descending) -> row positions
+        self._matchers = {col: _name_matcher(df[col]) for col in ('Player', 'Team')
+                          if col in df.columns}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def order(self, column, descending=False):
+        """Row positions sorted on ``column``, computed on first use."""
+        key = (column, descending)
+        with self._lock:
+            if key not in self._orders:
+                values = _sort_key(self.df[column])
+                if descending:
+                    values = -values
+                # np.where, not in place: the column may be a read-only mapped buffer.
+                values = np.where(np.isnan(values), np.inf, values)
+                self._orders[key] = np.argsort(values, kind='stable')
+            return self._orders[key]
+
+    def mask(self, team=None, search=''):
+        """Rows on ``team`` (None for all) whose player or team name contains ``search``."""
+        mask = np.ones(len(self.df), dtype=bool)
+        if team is not None and 'Team' in self.df.columns:
+            mask &= (self.df['Team'] == team).to_numpy(dtype=bool, na_value=False)
+        search = search.strip().lower()
+        if search:
+            found = np.zeros(len(self.df), dtype=bool)
+            for codes, names in self._matchers.values():
+                # Match the distinct names once, then map back to rows by code.
+                matched = np.append(names.str.contains(search, regex=False), False)
+                found |= matched[codes]
+            mask &= found
+        return mask
+
+    def rows(self, sort_by=None, descending=True, team=None, search=''):
+        """Matching row positions in display order."""
+        order = self.order(sort_by or self.default_sort, descending)
+        if team is None and not search.strip():
+            return order
+        return order[self.mask(team, search)[order]]
+
+    def page(self, rows, number, page_size=PAGE_SIZE):
+        """Rows ``number`` (1-based) of ``rows``, as plain values ready to display."""
+        start = (number - 1) * page_size
+        # Plain values, so the browser is not sent the shared category dictionaries.
+        return schema.plain(self.df.iloc[rows[start:start + page_size]])
+
+
+def page_count(n_rows, page_size=PAGE_SIZE):
+    return max(1, -(-n_rows // page_size))
@@ -0,0 +1,318 @@
+"""Process-level diagnostics, phase timing and per-rerun profiling.
+
+``phase(name)`` marks a block of the script as load, compute or render
+work. It costs nothing unless a ``PhaseRecorder`` is active, which the
+benchmark harness starts around each scripted run.
+
+``span(name)`` times a named block inside one rerun of the dashboard, and
+``section(name)`` starts the next top-level section of the page, so every
+span is reported as ``section/span/...``. Both are no-ops unless profiling
+is switched on with ``T20_PROFILE``, in which case each finished rerun is
+kept in memory for the debug panel and appended to a JSON Lines metrics
+file. Summarise that file (p50/p95 per page and span) with::
+
+    python telemetry.py metrics.jsonl
+    python telemetry.py metrics.jsonl --prometheus
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+
+try:
+    import psutil
+except ImportError:  # optional; /proc or resource is enough on Unix
+    psutil = None
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+def process_rss_bytes():
+    """Current resident set size of this process in bytes, or None if unknown."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is not None:
+        # Only the peak is available here; ru_maxrss is bytes on macOS, KiB elsewhere.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    return None
+
+
+#  PHASE TIMING
+class PhaseRecorder:
+    """Accumulates wall time per phase name while recording is active."""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self.totals[name] += seconds
+            self.counts[name] += 1
+
+
+_recorder = None
+
+
+def start_recording():
+    global _recorder
+    _recorder = PhaseRecorder()
+    return _recorder
+
+
+def stop_recording():
+    global _recorder
+    recorder, _recorder = _recorder, None
+    return recorder
+
+
+@contextmanager
+def phase(name):
+    # A phase is also a span, so profiles show load and render per section.
+    with span(name):
+        recorder = _recorder
+        if recorder is None:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            recorder.add(name, time.perf_counter() - start)
+
+
+#  RERUN PROFILING
+# T20_PROFILE=1 profiles every rerun and appends it to metrics.jsonl in the
+# working directory; T20_PROFILE=<path> writes to that file instead.
+PROFILE_ENV = "T20_PROFILE"
+DEFAULT_METRICS_FILE = "metrics.jsonl"
+
+# Runs kept in memory per page for the debug panel.
+MAX_RUNS = 500
+
+
+def _metrics_path():
+    value = os.environ.get(PROFILE_ENV, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return None
+    return DEFAULT_METRICS_FILE if value.lower() in ("1", "true", "yes") else value
+
+
+class RunProfile:
+    """Wall time per span path during one script run."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.totals = defaultdict(float)
+        self._section = None
+        self._section_start = None
+        self._stack = []
+
+    def _path(self):
+        return '/'.join(([self._section] if self._section else []) + self._stack)
+
+    def enter_section(self, name):
+        now = time.perf_counter()
+        self._close_section(now)
+        self._section, self._section_start = name, now
+
+    def _close_section(self, now):
+        if self._section is not None:
+            self.totals[self._section] += now - self._section_start
+        self._section = None
+
+    def finish(self, page):
+        now = time.perf_counter()
+        self._close_section(now)
+        return {
+            'ts': time.time(),
+            'page': page,
+            'total_ms': round((now - self.started) * 1000, 3),
+            'spans': {path: round(seconds * 1000, 3) for path, seconds in self.totals.items()},
+        }
+
+
+# Streamlit runs each session's script on its own thread.
+_local = threading.local()
+
+
+def start_run():
+    """Start profiling this thread's script run, if profiling is on."""
+    _local.profile = RunProfile() if run_metrics.enabled else None
+    return _local.profile
+
+
+def finish_run(page):
+    """Record this thread's run under ``page``; returns the record, or None."""
+    profile = getattr(_local, 'profile', None)
+    _local.profile = None
+    if profile is None:
+        return None
+    record = profile.finish(page)
+    run_metrics.record(record)
+    return record
+
+
+def section(name):
+    """End the current top-level section of the page and start ``name``."""
+    profile = getattr(_local, 'profile', None)
+    if profile is not None:
+        profile.enter_section(name)
+
+
+@contextmanager
+def span(name):
+    profile = getattr(_local, 'profile', None)
+    if profile is None:
+        yield
+        return
+    profile._stack.append(name)
+    path = profile._path()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.totals[path] += time.perf_counter() - start
+        profile._stack.pop()
+
+
+def profiling():
+    """Whether this thread's run is being profiled."""
+    return getattr(_local, 'profile', None) is not None
+
+
+@contextmanager
+def capture():
+    """Profile the spans inside the block into a {path: seconds} dict.
+
+    For work done where there is no run to record into, such as a render
+    worker process; the caller ships the dict back for ``add_spans``.
+    """
+    previous = getattr(_local, 'profile', None)
+    profile = _local.profile = RunProfile()
+    spans = {}
+    try:
+        yield spans
+    finally:
+        _local.profile = previous
+        spans.update(profile.totals)
+
+
+def add_spans(spans, prefix):
+    """Add spans timed elsewhere (``capture``) under the current span, as ``prefix/...``."""
+    profile = getattr(_local, 'profile', None)
+    if profile is None or not spans:
+        return
+    base = '/'.join(part for part in (profile._path(), prefix) if part)
+    for path, seconds in spans.items():
+        profile.totals[f"{base}/{path}"] += seconds
+
+
+def summarize(records):
+    """p50/p95 per (page, span) over run records, slowest page totals first."""
+    samples = defaultdict(list)
+    for record in records:
+        samples[(record['page'], 'total')].append(record['total_ms'])
+        for path, ms in record['spans'].items():
+            samples[(record['page'], path)].append(ms)
+    rows = []
+    for (page, path), values in samples.items():
+        p50, p95 = np.percentile(values, [50, 95])
+        rows.append({'Page': page, 'Span': path, 'Runs': len(values),
+                     'p50 ms': round(float(p50), 2), 'p95 ms': round(float(p95), 2)})
+    page_p95 = {row['Page']: row['p95 ms'] for row in rows if row['Span'] == 'total'}
+    rows.sort(key=lambda row: (-page_p95.get(row['Page'], 0), row['Page'],
+                               row['Span'] != 'total', -row['p95 ms']))
+    return rows
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def prometheus_text(records):
+    """The ``summarize`` quantiles in the Prometheus text exposition format."""
+    lines = ['# HELP t20_rerun_span_seconds Wall time of one dashboard rerun spent in a span.',
+             '# TYPE t20_rerun_span_seconds summary']
+    sums = defaultdict(float)
+    for record in records:
+        sums[(record['page'], 'total')] += record['total_ms']
+        for path, ms in record['spans'].items():
+            sums[(record['page'], path)] += ms
+    for row in summarize(records):
+        labels = f'page="{_label(row["Page"])}",span="{_label(row["Span"])}"'
+        for quantile, column in (('0.5', 'p50 ms'), ('0.95', 'p95 ms')):
+            lines.append(f't20_rerun_span_seconds{{{labels},quantile="{quantile}"}} '
+                         f'{row[column] / 1000:.6f}')
+        lines.append(f't20_rerun_span_seconds_sum{{{labels}}} '
+                     f'{sums[(row["Page"], row["Span"])] / 1000:.6f}')
+        lines.append(f't20_rerun_span_seconds_count{{{labels}}} {row["Runs"]}')
+    return '\n'.join(lines) + '\n'
+
+
+class RunMetrics:
+    """Recent run records per page, appended to a JSON Lines file as they finish."""
+
+    def __init__(self, path=None, max_runs=MAX_RUNS):
+        self.path = path
+        self.enabled = path is not None
+        self._runs = defaultdict(lambda: deque(maxlen=max_runs))
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        with self._lock:
+            self._runs[record['page']].append(record)
+            if self.path:
+                try:
+                    with open(self.path, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(record) + '\n')
+                except OSError:
+                    pass  # the panel still has it
+
+    def records(self, page=None):
+        with self._lock:
+            if page is not None:
+                return list(self._runs.get(page, ()))
+            return [record for runs in self._runs.values() for record in runs]
+
+
+# One set per process, shared by every Streamlit session.
+run_metrics = RunMetrics(_metrics_path())
+
+
+def read_metrics(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Summarise a dashboard metrics file.")
+    parser.add_argument("path", nargs="?", default=DEFAULT_METRICS_FILE)
+    parser.add_argument("--page", help="only this page")
+    parser.add_argument("--prometheus", action="store_true",
+                        help="print Prometheus text instead of a table")
+    args = parser.parse_args()
+    records = [r for r in read_metrics(args.path) if args.page in (None, r['page'])]
+    if args.prometheus:
+        sys.stdout.write(prometheus_text(records))
+    else:
+        print(f"{'Page':<28} {'Span':<48} {'Runs':>5} {'p50 ms':>9} {'p95 ms':>9}")
+        for row in summarize(records):
+            print(f"{row['Page']:<28} {row['Span']:<48} {row['Runs']:>5} "
+                  f"{row['p50 ms']:>9.2f} {row['p95 ms']:>9.2f}")
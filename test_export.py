@@ -0,0 +1,34 @@
+"""Checks for the report export on tournaments with missing stat files."""
+import os
+
+import pandas as pd
+
+import export
+import loader
+
+
+TOURNAMENT = 'icc_mens_t20_world_cup_2024'
+
+
+def _data_dir(tmp_path, tables, rows=3):
+    """A copy of the bundled data with only ``tables``, cut to a few rows each."""
+    for (table, tournament), path in loader.discover_sources(loader.DATA_DIR).items():
+        if table in tables:
+            pd.read_csv(path).head(rows).to_csv(tmp_path / os.path.basename(path), index=False)
+    return str(tmp_path)
+
+
+def test_players_export_without_match_results(tmp_path):
+    (tmp_path / "data").mkdir()
+    data_dir = _data_dir(tmp_path / "data", ('batting', 'bowling'))
+    rendered, skipped = export.export(str(tmp_path / "out"), TOURNAMENT, workers=1,
+                                      only='players', data_dir=data_dir)
+    assert rendered > 0 and skipped == 0
+    assert export._context.teams() == []
+
+
+def test_team_report_without_batting(tmp_path):
+    data_dir = _data_dir(tmp_path, ('bowling', 'matches'), rows=200)
+    context = export.ReportContext(data_dir, TOURNAMENT)
+    assert 'India' in context.teams()
+    assert context.render('team', 'India', 'png').startswith(b'\x89PNG')
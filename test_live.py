@@ -0,0 +1,81 @@
+"""Checks for the ball-by-ball aggregator and the live feed."""
+import json
+import threading
+import time
+
+import live
+
+
+BALL = {'match': 'm1', 'innings': 1, 'over': 0, 'batting_team': 'India',
+        'bowling_team': 'Pakistan', 'bowler': 'Naseem Shah', 'extras': 0, 'extra_type': None,
+        'wicket': None}
+
+
+def _batting(events):
+    aggregator = live.LiveAggregator()
+    for ball, event in enumerate(events, start=1):
+        aggregator.apply({**BALL, 'ball': ball, **event})
+    return aggregator.publish().tables['batting'].set_index('Player')
+
+
+def test_dismissed_without_facing():
+    batting = _batting([{'batter': 'RG Sharma', 'runs': 1,
+                         'wicket': {'kind': 'run out', 'player_out': 'V Kohli'}}])
+    kohli = batting.loc['V Kohli']
+    assert (kohli['Inns'], kohli['NO'], kohli['Runs'], kohli['0']) == (1, 0, 0, 1)
+    assert batting.loc['RG Sharma', 'NO'] == 1
+
+
+def test_non_striker_innings_counts():
+    batting = _batting([{'batter': 'RG Sharma', 'non_striker': 'RR Pant', 'runs': 0}])
+    assert (batting.loc['RR Pant', 'Inns'], batting.loc['RR Pant', 'NO']) == (1, 1)
+
+
+def test_retired_hurt_is_not_out():
+    batting = _batting([{'batter': 'RG Sharma', 'runs': 0,
+                         'wicket': {'kind': 'retired hurt', 'player_out': 'RG Sharma'}}])
+    sharma = batting.loc['RG Sharma']
+    assert (sharma['Inns'], sharma['NO'], sharma['0']) == (1, 1, 0)
+
+
+def test_malformed_event_leaves_totals_alone():
+    aggregator = live.LiveAggregator()
+    try:
+        aggregator.apply({'match': 'm1', 'runs': 4})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("missing batter/bowler was accepted")
+    assert aggregator.events == 0 and not aggregator.batting
+
+
+def test_tail_holds_back_a_partial_line(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    event = json.dumps({**BALL, 'ball': 1, 'batter': 'RG Sharma', 'runs': 4})
+    path.write_text(event[:20], encoding='utf-8')
+    stop = threading.Event()
+    lines = live.tail_file(str(path), poll_interval=0.01, stop=stop)
+    # The first 20 characters are read, but not handed on without a newline.
+    assert [next(lines) for _ in range(3)] == [None, None, None]
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(event[20:] + "\n")
+    line = next(line for line in lines if line is not None)
+    stop.set()
+    assert json.loads(line)['runs'] == 4
+
+
+def test_feed_skips_malformed_events_and_keeps_going(tmp_path):
+    path = tmp_path / "feed.jsonl"
+    good = json.dumps({**BALL, 'ball': 1, 'batter': 'RG Sharma', 'runs': 4})
+    path.write_text("{not json\n" + json.dumps({'match': 'm1'}) + "\n" + good + "\n",
+                    encoding='utf-8')
+    feed = live.LiveFeed(str(path), publish_interval=0.01).start()
+    try:
+        deadline = time.monotonic() + 5
+        while feed.aggregator.events < 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert feed.running
+        assert feed.skipped == 2
+        assert feed.aggregator.batting['RG Sharma']['Runs'] == 4
+    finally:
+        feed.stop()
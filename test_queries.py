@@ -0,0 +1,46 @@
+"""Regression checks for the memoised queries over the bundled 2024 data."""
+import pandas as pd
+
+import loader
+import queries
+
+
+TOURNAMENT = 'icc_mens_t20_world_cup_2024'
+
+
+def _queries(use_snapshot):
+    store = loader.DataStore(use_snapshot=use_snapshot)
+    store.refresh(force=True)
+    return queries.StatsQueries.from_store(store, TOURNAMENT)
+
+
+def test_team_columns_share_one_dtype():
+    matches = _queries(False).get_table('matches')
+    assert matches['Team 1'].dtype == matches['Team 2'].dtype == matches['Winner'].dtype
+
+
+def test_head_to_head():
+    # Team 1 and Team 2 list different teams, so their categories used to differ.
+    for use_snapshot in (False, True):
+        result = _queries(use_snapshot).head_to_head('India', 'Pakistan')
+        assert result['played'] == 1
+        assert result['wins'] == {'India': 1, 'Pakistan': 0}
+
+
+def test_ground_ties_sort_by_name():
+    # The shared Ground dictionary is in first-seen order, not alphabetical.
+    grounds = _queries(False).ground_results()
+    for _, tied in grounds.groupby('Matches', sort=False):
+        names = tied['Ground'].astype(str).tolist()
+        assert names == sorted(names)
+
+
+def test_match_queries_without_results_file():
+    # A missing file reaches the queries as a frame with no columns.
+    stats = queries.StatsQueries(lambda table: pd.DataFrame())
+    result = stats.head_to_head('India', 'Pakistan')
+    assert result['played'] == 0
+    assert result['wins'] == {'India': 0, 'Pakistan': 0}
+    assert result['matches'].empty
+    assert stats.ground_results().empty
+    assert stats.top_winners().empty and stats.team_records().empty
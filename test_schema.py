@@ -0,0 +1,47 @@
+"""Checks for the declared dtypes and the shared category dictionaries."""
+import numpy as np
+import pandas as pd
+
+import schema
+
+
+def test_domain_columns_share_one_dictionary():
+    registry = schema.CategoryRegistry()
+    matches = schema.apply('matches', pd.DataFrame({
+        'Team 1': ['India'], 'Team 2': ['Pakistan'], 'Winner': ['India'],
+    }), registry)
+    batting = schema.apply('batting', pd.DataFrame({'Team': ['Nepal', 'India']}), registry)
+    assert matches['Team 1'].dtype == matches['Team 2'].dtype == matches['Winner'].dtype
+    # The dictionary only grows, so codes stay comparable between frames.
+    assert batting['Team'].cat.categories.tolist() == ['India', 'Pakistan', 'Nepal']
+    assert matches['Team 1'].cat.codes[0] == batting['Team'].cat.codes[1]
+    assert (matches['Team 1'] == matches['Winner']).all()
+
+
+def test_counts_downcast_and_rates_are_float32():
+    df = schema.apply('batting', pd.DataFrame({
+        'Runs': ['12', '300'], 'HS': ['7', '-'], 'Ave': ['12.5', '30.0'],
+    }), schema.CategoryRegistry())
+    assert df['Runs'].dtype == np.int16
+    assert df['HS'].dtype == 'Int8' and df['HS'].isna()[1]
+    assert df['Ave'].dtype == np.float32
+
+
+def test_attach_translates_snapshot_codes():
+    registry = schema.CategoryRegistry()
+    schema.apply('batting', pd.DataFrame({'Player': ['B Kumar']}), registry)
+    # Written by another process, whose dictionary started elsewhere.
+    snapshot = pd.DataFrame({'Player': pd.Categorical(['A Dutt', 'B Kumar', None])})
+    df = schema.attach('batting', snapshot, registry)
+    assert df['Player'].dtype == registry.dtype('player', pd.Series([], dtype=str))
+    assert df['Player'].tolist()[:2] == ['A Dutt', 'B Kumar'] and pd.isna(df['Player'][2])
+
+
+def test_plain_drops_unused_categories():
+    registry = schema.CategoryRegistry()
+    schema.apply('batting', pd.DataFrame({'Player': ['Unused']}), registry)
+    df = schema.apply('batting', pd.DataFrame({'Player': ['A Dutt'], 'Runs': ['5']}), registry)
+    plain = schema.plain(df)
+    assert not isinstance(plain['Player'].dtype, pd.CategoricalDtype)
+    assert plain['Player'].tolist() == ['A Dutt']
+    assert isinstance(df['Player'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,32 @@
+"""Checks for the table view's sort keys over shared category dictionaries."""
+import numpy as np
+import pandas as pd
+
+import tableview
+
+
+def test_categoricals_sort_alphabetically():
+    # The registry lists names in the order they were first seen, not A-Z.
+    dtype = pd.CategoricalDtype(['Zampa', 'Babar', 'Kohli', 'Unused'])
+    values = pd.Series(['Kohli', None, 'Zampa', 'Babar'], dtype=dtype)
+    key = tableview._sort_key(values)
+    assert np.isnan(key[1])
+    assert key[3] < key[0] < key[2]
+
+
+def test_view_orders_names_with_missing_last():
+    dtype = pd.CategoricalDtype(['Zampa', 'Babar', 'Kohli'])
+    view = tableview.TableView(pd.DataFrame({
+        'Player': pd.Series(['Kohli', 'Zampa', None, 'Babar'], dtype=dtype),
+        'Runs': [3, 1, 2, 4],
+    }))
+    rows = view.rows('Player', descending=False)
+    assert view.page(rows, 1)['Player'].tolist()[:3] == ['Babar', 'Kohli', 'Zampa']
+    rows = view.rows('Player', descending=True)
+    assert view.page(rows, 1)['Player'].tolist()[:3] == ['Zampa', 'Kohli', 'Babar']
+
+
+def test_object_columns_sort_on_text():
+    key = tableview._sort_key(pd.Series(['b', 10, None, 'a'], dtype=object))
+    assert np.isnan(key[2])
+    assert key[1] < key[3] < key[0]
@@ -0,0 +1,202 @@
+"""Vega-Lite specs for the dashboard charts, rendered in the browser.
+
+``chart_spec`` takes the same chart kind, input frame and options as
+``charts.render_chart`` and returns the few columns the chart needs plus a
+Vega-Lite spec. Streamlit ships both to the browser, which draws the chart
+and handles hover, zoom and legend toggles itself, so none of those cost a
+server rerun. Colours come from the same seaborn palettes and theme as the
+Matplotlib charts, which remain the export path.
+"""
+import pandas as pd
+import seaborn as sns
+
+import charts
+import schema
+
+
+#  THEME
+# The Matplotlib theme, restated as a Vega-Lite config.
+BACKGROUND = charts.THEME_RC['figure.facecolor']
+TEXT_COLOR = charts.THEME_RC['text.color']
+TITLE_COLOR = charts.THEME_RC['axes.titlecolor']
+
+THEME_CONFIG = {
+    'background': BACKGROUND,
+    'view': {'fill': BACKGROUND, 'stroke': None},
+    'title': {'color': TITLE_COLOR, 'fontSize': 15},
+    'axis': {'labelColor': TEXT_COLOR, 'titleColor': TEXT_COLOR,
+             'gridColor': '#3A3A3A', 'domainColor': '#3A3A3A', 'tickColor': '#3A3A3A'},
+    'legend': {'labelColor': TEXT_COLOR, 'titleColor': TEXT_COLOR},
+    'header': {'labelColor': TEXT_COLOR, 'titleColor': TEXT_COLOR},
+}
+
+
+def _colors(palette, n):
+    return sns.color_palette(palette, n).as_hex()
+
+
+def _field_type(data, field):
+    return 'quantitative' if pd.api.types.is_numeric_dtype(data[field]) else 'nominal'
+
+
+def _compact(data, columns):
+    """Only the columns a chart encodes, without the shared category dictionaries."""
+    return schema.plain(data[list(columns)].reset_index(drop=True))
+
+
+def _tooltip(data, fields):
+    return [{'field': f, 'type': _field_type(data, f)} for f in fields]
+
+
+#  SPEC BUILDERS
+# Each one mirrors the Matplotlib function of the same kind in charts.py.
+def bar_spec(data, x, y, palette, title, xlabel=None, ylabel=None,
+             figsize=None, rotate_xticks=False):
+    frame = _compact(data, [x, y])
+    # The category axis is the non-numeric one; bars keep the frame's order.
+    category = y if _field_type(frame, x) == 'quantitative' else x
+    values = frame[category].tolist()
+    encoding = {
+        'x': {'field': x, 'type': _field_type(frame, x), 'title': xlabel or x},
+        'y': {'field': y, 'type': _field_type(frame, y), 'title': ylabel or y},
+        'color': {'field': category, 'type': 'nominal', 'legend': None, 'sort': None,
+                  'scale': {'domain': values, 'range': _colors(palette, len(values))}},
+        'tooltip': _tooltip(frame, [x, y]),
+    }
+    encoding['x' if category == x else 'y']['sort'] = None
+    if rotate_xticks:
+        encoding['x']['axis'] = {'labelAngle': -45}
+    return frame, {'title': title, 'mark': {'type': 'bar'}, 'encoding': encoding}
+
+
+def donut_spec(data, values, labels, palette, title):
+    frame = _compact(data, [labels, values])
+    names = frame[labels].tolist()
+    spec = {
+        'title': title,
+        'transform': [
+            {'joinaggregate': [{'op': 'sum', 'field': values, 'as': '_total'}]},
+            {'calculate': f"datum['{values}'] / datum._total", 'as': 'Share'},
+        ],
+        'mark': {'type': 'arc', 'innerRadius': 70, 'stroke': BACKGROUND},
+        'encoding': {
+            'theta': {'field': values, 'type': 'quantitative', 'stack': True},
+            'order': {'field': '_row', 'type': 'quantitative'},
+            'color': {'field': labels, 'type': 'nominal', 'sort': None,
+                      'scale': {'domain': names, 'range': _colors(palette, len(names))}},
+            'tooltip': [{'field': labels, 'type': 'nominal'},
+                        {'field': values, 'type': 'quantitative'},
+                        {'field': 'Share', 'type': 'quantitative', 'format': '.1%'}],
+        },
+    }
+    frame['_row'] = range(len(frame))
+    return frame, spec
+
+
+def scatter_spec(data, x, y, size, hue, title):
+    fields = (['Player'] if 'Player' in data.columns else []) + [x, y, size, hue]
+    frame = _compact(data, dict.fromkeys(fields))
+    teams = list(dict.fromkeys(frame[hue].tolist()))
+    spec = {
+        'title': title,
+        'height': 420,
+        # Drag to pan, scroll to zoom, click a legend entry to toggle a team.
+        'params': [
+            {'name': 'zoom', 'select': 'interval', 'bind': 'scales'},
+            {'name': 'teams', 'select': {'type': 'point', 'fields': [hue]}, 'bind': 'legend'},
+        ],
+        'mark': {'type': 'circle'},
+        'encoding': {
+            'x': {'field': x, 'type': 'quantitative', 'scale': {'zero': False}},
+            'y': {'field': y, 'type': 'quantitative', 'scale': {'zero': False}},
+            'size': {'field': size, 'type': 'quantitative', 'scale': {'range': [20, 500]}},
+            'color': {'field': hue, 'type': 'nominal',
+                      'scale': {'domain': teams, 'range': _colors('bright', len(teams))}},
+            'opacity': {'condition': {'param': 'teams', 'value': 0.85}, 'value': 0.08},
+            'tooltip': _tooltip(frame, frame.columns),
+        },
+    }
+    return frame, spec
+
+
+def hist_spec(data, x, color, title, xlabel, bins=20):
+    frame = _compact(data, [x])
+    spec = {
+        'title': title,
+        'mark': {'type': 'bar', 'color': color, 'opacity': 0.8},
+        'encoding': {
+            'x': {'field': x, 'type': 'quantitative', 'bin': {'maxbins': bins}, 'title': xlabel},
+            'y': {'aggregate': 'count', 'type': 'quantitative', 'title': 'Count'},
+            'tooltip': [{'field': x, 'type': 'quantitative', 'bin': {'maxbins': bins}},
+                        {'aggregate': 'count', 'type': 'quantitative', 'title': 'Count'}],
+        },
+    }
+    return frame, spec
+
+
+def wk_breakdown_spec(data):
+    frame = _compact(data, ['Player', 'Ct', 'St'])
+    players = frame['Player'].tolist()
+    spec = {
+        'title': "Dismissal Breakdown (Catches vs. Stumpings)",
+        'transform': [{'fold': ['Ct', 'St'], 'as': ['Dismissal Type', 'Count']}],
+        'mark': {'type': 'bar'},
+        'encoding': {
+            'y': {'field': 'Player', 'type': 'nominal', 'sort': players},
+            'yOffset': {'field': 'Dismissal Type', 'sort': ['Ct', 'St']},
+            'x': {'field': 'Count', 'type': 'quantitative'},
+            'color': {'field': 'Dismissal Type', 'type': 'nominal',
+                      'scale': {'domain': ['Ct', 'St'], 'range': ["#4C8FFB", "#00BFA5"]}},
+            'tooltip': [{'field': 'Player', 'type': 'nominal'},
+                        {'field': 'Dismissal Type', 'type': 'nominal'},
+                        {'field': 'Count', 'type': 'quantitative'}],
+        },
+    }
+    return frame, spec
+
+
+def compare_grid_spec(data, panels):
+    frame = _compact(data, ['Group', 'Player', 'Metric', 'Value'])
+    players = list(dict.fromkeys(frame['Player'].tolist()))
+    rows = []
+    for group in dict.fromkeys(p[0] for p in panels):
+        if not (frame['Group'] == group).any():
+            continue
+        row = []
+        for _, metric, title, palette in (p for p in panels if p[0] == group):
+            row.append({
+                'title': f"{group}: {title}",
+                'width': 160,
+                'transform': [{'filter': {'and': [{'field': 'Group', 'equal': group},
+                                                  {'field': 'Metric', 'equal': metric}]}}],
+                'mark': {'type': 'bar'},
+                'encoding': {
+                    'x': {'field': 'Player', 'type': 'nominal', 'sort': players, 'title': None,
+                          'axis': {'labelAngle': -45}},
+                    'y': {'field': 'Value', 'type': 'quantitative', 'title': None},
+                    'color': {'field': 'Player', 'type': 'nominal', 'legend': None,
+                              'scale': {'domain': players,
+                                        'range': _colors(palette, len(players))}},
+                    'tooltip': [{'field': 'Player', 'type': 'nominal'},
+                                {'field': 'Value', 'type': 'quantitative'}],
+                },
+            })
+        rows.append({'hconcat': row, 'resolve': {'scale': {'color': 'independent'}}})
+    return frame, {'vconcat': rows, 'resolve': {'scale': {'color': 'independent'}}}
+
+
+SPECS = {
+    'bar': bar_spec,
+    'donut': donut_spec,
+    'scatter': scatter_spec,
+    'hist': hist_spec,
+    'wk_breakdown': wk_breakdown_spec,
+    'compare_grid': compare_grid_spec,
+}
+
+
+def chart_spec(kind, data, **opts):
+    """(compact frame, themed Vega-Lite spec) for one chart."""
+    frame, spec = SPECS[kind](data, **opts)
+    spec['config'] = THEME_CONFIG
+    return frame, spec